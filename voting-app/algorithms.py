@@ -14,14 +14,45 @@ def round_to_significant_digits(string, n):
     return string
 
 
+# Votes files store a ballot's scores in one of two layouts. Older files have
+# an option_<id> column per option. Newer ones have a single SCORES_FIELD
+# column of space-separated "<option id>:<score>" pairs that leaves out every
+# zero, so a ballot that scores 3 options out of 300 stays short.
+SCORES_FIELD = "scores"
+
+
+def encode_scores(scores_by_id):
+    """{option id: score} -> the SCORES_FIELD text (zeros left out)."""
+    return " ".join(
+        f"{opt_id}:{score}" for opt_id, score in scores_by_id.items() if score
+    )
+
+
+def decode_scores(text):
+    """The SCORES_FIELD text -> {option id: score} for the non-zero scores."""
+    scores = {}
+    for pair in text.split():
+        opt_id, _, score = pair.rpartition(":")
+        scores[opt_id] = int(score)
+    return scores
+
+
+def vote_scores(vote, option_ids):
+    """A CSV vote row's scores, one int per option id, whichever layout it's in."""
+    if SCORES_FIELD in vote:
+        sparse = decode_scores(vote[SCORES_FIELD] or "")
+        return [sparse.get(opt_id, 0) for opt_id in option_ids]
+    return [int(vote.get(f"option_{opt_id}", 0)) for opt_id in option_ids]
+
+
 def parse_votes(votes, options):
     """Convert CSV vote rows to usable format"""
     parsed = []
+    option_ids = [opt["id"] for opt in options]
     for vote in votes:
-        scores = {}
-        for opt in options:
-            key = f"option_{opt['id']}"
-            scores[opt["name"]] = int(vote.get(key, 0))
+        scores = dict(
+            zip((opt["name"] for opt in options), vote_scores(vote, option_ids))
+        )
         parsed.append({"username": vote["username"], "scores": scores})
     return parsed
 
@@ -61,8 +92,14 @@ def schulze_method(parsed_votes, option_names):
                 if option_a != option_b and score_a > score_b:
                     preferences[(option_a, option_b)] += 1
     """
-    preferences = find_preferences(parsed_votes)
+    return _schulze_ranking(
+        find_preferences(parsed_votes), _total_scores(parsed_votes), option_names
+    )
 
+
+def _schulze_ranking(preferences, total_scores, option_names):
+    """The part of schulze_method that only needs the pairwise preferences
+    and the per-option total scores (for tiebreaking)."""
     # implementation of strongest path strength computation from https://en.wikipedia.org/wiki/Schulze_method
     path_strength = {}
     for i in option_names:
@@ -92,8 +129,8 @@ def schulze_method(parsed_votes, option_names):
                     # A is better than B
                     ranking[option_a] += 1
 
-    return tiebreak_with_total_scores(
-        parsed_votes, sorted(ranking.items(), reverse=True, key=lambda x: x[1])
+    return _sort_with_total_scores(
+        total_scores, sorted(ranking.items(), reverse=True, key=lambda x: x[1])
     )
 
 
@@ -113,18 +150,26 @@ def borda_count(parsed_votes, option_names):
     return score_voting(borda_votes, option_names)
 
 
-def tiebreak_with_total_scores(parsed_votes, ranked_items):
-    """Sort a list of ranked voting options using the total score given to them by voters."""
+def _total_scores(parsed_votes):
     total_scores = {}
     for ballot in parsed_votes:
         scores = ballot["scores"].items()
         for option, score in scores:
             total_scores[option] = total_scores.get(option, 0) + score
+    return total_scores
+
+
+def _sort_with_total_scores(total_scores, ranked_items):
     return sorted(
         ranked_items, reverse=True, key=lambda x: (x[1], total_scores.get(x[0], 0))
     )
 
 
+def tiebreak_with_total_scores(parsed_votes, ranked_items):
+    """Sort a list of ranked voting options using the total score given to them by voters."""
+    return _sort_with_total_scores(_total_scores(parsed_votes), ranked_items)
+
+
 # am using this bad boy to test frontend.
 def score_voting(parsed_votes, option_names):
     """Simple sum of scores"""
@@ -140,11 +185,8 @@ def star_voting(parsed_votes, option_names):
     # this method sorts candidates by total score, then considers the top two candidates to find a winner
     # We already have a method to rank candidates by score, so we'll use that
     options = score_voting(parsed_votes, option_names)
-    ranking = []
-    for _ in range(len(options) - 1):
-        # out of the top two options, the winner is the one with the higher score on the most ballots
-        A, _ = options[0]
-        B, _ = options[1]
+
+    def head_to_head(A, B):
         A_wins = 0
         B_wins = 0
         for ballot in parsed_votes:
@@ -152,6 +194,20 @@ def star_voting(parsed_votes, option_names):
                 A_wins += 1
             elif ballot["scores"][A] < ballot["scores"][B]:
                 B_wins += 1
+        return A_wins, B_wins
+
+    return _star_runoff(options, head_to_head)
+
+
+def _star_runoff(options, head_to_head):
+    """STAR's runoff stage. `options` is the score-voting order and
+    `head_to_head(A, B)` returns how many ballots prefer A to B and B to A."""
+    ranking = []
+    for _ in range(len(options) - 1):
+        # out of the top two options, the winner is the one with the higher score on the most ballots
+        A, _ = options[0]
+        B, _ = options[1]
+        A_wins, B_wins = head_to_head(A, B)
         if A_wins >= B_wins:
             # add the winner to the final ranking and remove it from the options to give the others a chance
             del options[0]
@@ -167,14 +223,37 @@ def star_voting(parsed_votes, option_names):
     return ranking
 
 
-def kemeny_young(parsed_votes, option_names, brute_force=False):
-    """Kemeny-Young rule/Kemeny method. Set brute_force=True to verify the result using brute-force."""
+# How many DP states kemeny_young explores between `progress` callbacks.
+KEMENY_PROGRESS_EVERY = 256
+
+
+# Costs are sums of normalized (fractional) preferences, so two ways of adding
+# up the same arcs can differ in the last bits. Compare costs with this slack.
+KEMENY_COST_EPSILON = 1e-9
+
+
+def kemeny_young(
+    parsed_votes, option_names, brute_force=False, progress=None, seed=None
+):
+    """Kemeny-Young rule/Kemeny method. Set brute_force=True to verify the result using brute-force.
+    `progress`, if given, is called with the number of DP subset states explored so far.
+    `seed` is a warm start: a previous ranking (list of option names, best first), typically
+    this poll's last result. Its cost is an upper bound on the optimum, which tightens the
+    kernelization and the DP window, and if it's still optimal it's returned as-is."""
     # Gonna be lots of comments in this one. Based it on a math paper so steel yourself.
     # Sources are this book chapter for the entire algorithm:
     # https://link.springer.com/chapter/10.1007/978-3-642-17517-6_3
     # And this paper for the weighted indegree-sorting used to produce the initial ranking:
     # https://cse.buffalo.edu/faculty/atri/papers/algos/FAS-journal-final.pdf
     preferences = find_preferences(parsed_votes, mask=option_names.index)
+    return _kemeny_young_ranking(preferences, option_names, brute_force, progress, seed)
+
+
+def _kemeny_young_ranking(
+    preferences, option_names, brute_force=False, progress=None, seed=None
+):
+    """The part of kemeny_young that only needs the pairwise preferences,
+    keyed by option index."""
     # With the preferences known, we now have to find the sequence of candidates that satisfies the most voters' preferences.
     # This is NP-hard and slow and awful no matter what, especially with more candidates.
 
@@ -205,6 +284,16 @@ def kemeny_young(parsed_votes, option_names, brute_force=False):
     # C is our cost function and computes the weight of the preferences we don't fulfill (the backwards arcs in a graph of candiates with preferences as edges)
     C = lambda π: sum(preferences[(u, v)] for i, v in enumerate(π) for u in π[i + 1 :])
     print(f"Initial ranking is ->{π1} with cost {C(π1)}")
+    # U is an upper bound on the optimal cost. It will be somewhere between the optimal cost and 5 times the optimal cost.
+    U = C(π1)
+    # A warm start from a previous ranking can only make U tighter. Everything below that uses U stays valid for any U
+    # that's at least the optimum, and every ranking's cost is.
+    π_seed = None
+    if seed is not None and sorted(seed) == sorted(option_names):
+        π_seed = [option_names.index(name) for name in seed]
+        if C(π_seed) < U:
+            U = C(π_seed)
+            print(f"Seed ranking ->{π_seed} tightens the upper bound to {U}")
     # b computes the weight of the arcs incident to v in the ordering formed by moving v to position p in π.
     b = lambda π, v, p: sum(
         (preferences[(u, v)], preferences[(v, u)])[p > π.index(u)]
@@ -212,7 +301,7 @@ def kemeny_young(parsed_votes, option_names, brute_force=False):
         if u != v and p != π.index(u)
     )
     # r defines the uncertainty of each candidate's placement in the ranking.
-    r = {v: (4 * sqrt(2 * C(π1))) + (2 * b(π1, v, π1.index(v))) for v in V}
+    r = {v: (4 * sqrt(2 * U)) + (2 * b(π1, v, π1.index(v))) for v in V}
     print("Uncertainties computed:")
     for i, v in enumerate(V):
         print(
@@ -248,10 +337,8 @@ def kemeny_young(parsed_votes, option_names, brute_force=False):
     in_triangle = lambda v, ts: any(v in t for t in ts)
     in_triangles = lambda v, u, ts: sum((v in t and u in t) for t in ts if (v, u) in mt)
     mt_cost = lambda mt: sum(preferences[(A, B)] for (A, B) in mt)
-    # U will be somewhere between the optimal cost and 5 times the optimal cost.
-    # At the end of kernelization it should be equal to the initial cost C(π1),
+    # At the end of kernelization the kernel cost should not exceed U,
     # which indicates that the kernel is a more compact version of our existing problem, as intended.
-    U = C(π1)
     must_pay = 0
     trivial = []  # [(vertex, predecessor set, successor set)]
     while True:
@@ -297,28 +384,52 @@ def kemeny_young(parsed_votes, option_names, brute_force=False):
             print(
                 f"'{v}' comes after {p if p else 'nothing'} and before {s if s else 'nothing'}{' (first place in ranking)' if not s else ' (last place in ranking)' if not p else ''}."
             )
-    if U < mt_cost(mt) + must_pay:
+    if U + KEMENY_COST_EPSILON < mt_cost(mt) + must_pay:
         raise RuntimeError(  # Kernel cost must not be greater than the initial cost, or the kernel is invalid!
-            f"Sanity check failed: Kernel cost {mt_cost(mt) + must_pay} is greater than initial cost {C(π1)}"
+            f"Sanity check failed: Kernel cost {mt_cost(mt) + must_pay} is greater than initial cost {U}"
         )
     # It's time for dynamic programming so we can find our optimal ranking π2.
-    valid = lambda S: (
+    in_window = lambda S: (
         all(v in S for v in V if (π1.index(v) <= (len(S) - r[v])))
         and all(v not in S for v in V if (π1.index(v) > (len(S) + r[v])))
     )
+    # Branch and bound on top of the window. The DP builds rankings bottom-up, so every subset S it visits is the
+    # bottom of some ranking. Any ranking with bottom S pays at least the cheaper direction of every pair, plus
+    # the full "excess" of each pair split across S and the rest with the S-side preferred (it's ranked below).
+    # If that already beats the best full ranking we know of, S can't be part of an optimal one.
+    kernel_cost = lambda π: C([v for v in π if v in V])
+    U_dp = min(kernel_cost(π1), kernel_cost(π_seed) if π_seed is not None else U)
+    floor_cost = sum(
+        min(preferences[(u, w)], preferences[(w, u)])
+        for i, u in enumerate(V)
+        for w in V[i + 1 :]
+    )
+    excess = lambda S: sum(
+        max(0, preferences[(u, w)] - preferences[(w, u)])
+        for u in S
+        for w in V
+        if w not in S
+    )
+    promising = lambda S: floor_cost + excess(S) <= U_dp + KEMENY_COST_EPSILON
+    valid = lambda S: in_window(S) and promising(S)
     # subset_cost handles our memoization. Cbar computes the optimal cost of ranking the candidates in set S.
     subset_cost = {}
-    Cbar = lambda S: subset_cost.setdefault(
-        S,
-        min(
-            [
-                (Cbar(S - {v}) + sum(preferences[(u, v)] for u in S - {v}))
-                for v in S
-                if valid(S - {v})
-            ],
-            default=0,
-        ),
-    )
+
+    def Cbar(S):
+        if S not in subset_cost:
+            subset_cost[S] = min(
+                [
+                    (Cbar(S - {v}) + sum(preferences[(u, v)] for u in S - {v}))
+                    for v in S
+                    if valid(S - {v})
+                ],
+                # Only the empty ranking is free; a subset we can't build from a valid one is out of reach.
+                default=0 if not S else float("inf"),
+            )
+            if progress and len(subset_cost) % KEMENY_PROGRESS_EVERY == 0:
+                progress(len(subset_cost))
+        return subset_cost[S]
+
     # We can fill out subset_cost by giving Cbar the full set of candidates we want to rank.
     # (We use a frozenset because it is immutable and thus hashable)
     π2 = []
@@ -339,6 +450,8 @@ def kemeny_young(parsed_votes, option_names, brute_force=False):
                 f"Cbar({set(s) if s else 'Ø'}) = {subset_cost[s]}",
                 end=("\t" if i != len(subset_cost) - 1 else "\n"),
             )
+    if progress:
+        progress(len(subset_cost))
     print(f"Non-trivial ranking is ->{π2}")
 
     # Now we have ranked the non-trivial candidates. It's time to insert the trivial ones.
@@ -351,8 +464,16 @@ def kemeny_young(parsed_votes, option_names, brute_force=False):
                 f"Sanity check failed: Predecessors {p} and successors {s} overlap in ranking {π2}."
             )
         π2.insert(min_p, v)
+    # Among equally good rankings, keep the previous one so results don't flip-flop between them as votes come in.
+    if π_seed is not None and C(π_seed) <= C(π2) + KEMENY_COST_EPSILON:
+        print(f"Seed ranking ->{π_seed} is still optimal.")
+        π2 = π_seed
     print(f"Final ranking is ->{π2} with cost {C(π2)}")
-    if brute_force and (cost := KY_brute_force(option_names, C)) != C(π2):
+    if (
+        brute_force
+        and abs((cost := KY_brute_force(option_names, C)) - C(π2))
+        > KEMENY_COST_EPSILON
+    ):
         raise RuntimeError(  # The solution should have the same cost as the optimal brute-force solution.
             f"Sanity check failed: Final cost {C(π2)} does not agree with brute-force optimal cost {cost}"
         )
@@ -363,13 +484,13 @@ def KY_brute_force(option_names, C):
     """Brute-force optimal cost of the Kemeny-Young method.\n
     Do not, under any circumstances, use this for anything other than testing."""
     optimal_solutions = []
-    optimal_cost = len(option_names)
+    optimal_cost = float("inf")
     print("Starting brute-force attempt.")
     for π in permutations(range(len(option_names))):
-        if (cost := C(π)) < optimal_cost:
+        if (cost := C(π)) < optimal_cost - KEMENY_COST_EPSILON:
             optimal_solutions = [π]
             optimal_cost = cost
-        elif cost == optimal_cost:
+        elif cost <= optimal_cost + KEMENY_COST_EPSILON:
             optimal_solutions.append(π)
     print(f"Brute-force finds the following rankings with optimal cost {optimal_cost}:")
     for π in optimal_solutions:
@@ -377,24 +498,414 @@ def KY_brute_force(option_names, C):
     return optimal_cost
 
 
+# ============== TALLIES ==============
+#
+# A tally is everything the methods above actually need to know about a pile
+# of ballots, in O(N²) space however many ballots there are:
+#
+#   {"count": number of ballots,
+#    "totals": [sum of scores for option i, ...],
+#    "pairwise": [[number of ballots scoring option i above option j, ...], ...]}
+#
+# Lists are indexed by option position. Tallies of disjoint sets of ballots
+# add up elementwise (merge_tallies), which is what lets a huge votes file be
+# tallied in parallel chunks, and the *_from_tally methods below give exactly
+# the same results as their parsed-votes counterparts as long as option
+# names are distinct (admin_create guarantees that).
+
+
+def new_tally(n):
+    return {"count": 0, "totals": [0] * n, "pairwise": [[0] * n for _ in range(n)]}
+
+
+def add_ballot(tally, scores):
+    """Fold one ballot (a list of ints, one per option) into `tally`."""
+    tally["count"] += 1
+    totals = tally["totals"]
+    for i, score_a in enumerate(scores):
+        totals[i] += score_a
+        row = tally["pairwise"][i]
+        for j, score_b in enumerate(scores):
+            if score_a > score_b:
+                row[j] += 1
+
+
+# Most ballots on a poll with many options leave most of them at 0, and
+# add_ballot spends O(N²) on each regardless. A sparse tally only does work
+# for the k options a ballot actually scored, O(k²):
+#
+#   pairwise[i][j] = #(ballots with s_i > s_j)
+#                  = #(s_i > 0) - #(s_i > 0 and s_j > 0 and s_i <= s_j)
+#
+# since an option scored above 0 beats every unscored one and zero-vs-zero
+# is never a preference (scores are never negative). The first term is one
+# counter per option ("scored"); the second only involves pairs the ballot
+# scored. finish_sparse_tally adds the counters in once at the end.
+
+
+def new_sparse_tally(n):
+    tally = new_tally(n)
+    tally["scored"] = [0] * n
+    return tally
+
+
+def add_sparse_ballot(tally, scored):
+    """Fold one ballot, given as (option index, score) pairs for its
+    non-zero scores only, into a tally from new_sparse_tally."""
+    tally["count"] += 1
+    totals = tally["totals"]
+    counts = tally["scored"]
+    pairwise = tally["pairwise"]
+    for i, score_a in scored:
+        totals[i] += score_a
+        counts[i] += 1
+        row = pairwise[i]
+        # j == i is included: it cancels counts[i] on the diagonal.
+        for j, score_b in scored:
+            if score_a <= score_b:
+                row[j] -= 1
+
+
+def finish_sparse_tally(tally):
+    """Turn a tally from new_sparse_tally into a regular one (in place)."""
+    for row, count in zip(tally["pairwise"], tally.pop("scored")):
+        if count:
+            for j in range(len(row)):
+                row[j] += count
+    return tally
+
+
+def merge_tallies(a, b):
+    """Return the tally of the ballots in `a` and `b` together."""
+    return {
+        "count": a["count"] + b["count"],
+        "totals": [x + y for x, y in zip(a["totals"], b["totals"])],
+        "pairwise": [
+            [x + y for x, y in zip(row_a, row_b)]
+            for row_a, row_b in zip(a["pairwise"], b["pairwise"])
+        ],
+    }
+
+
+def subset_tally(tally, indices):
+    """The tally the same ballots would have had if only the options at
+    `indices` (in that order) had been on them. Every entry only depends on
+    its own option or pair, so this is just a slice."""
+    return {
+        "count": tally["count"],
+        "totals": [tally["totals"][i] for i in indices],
+        "pairwise": [[tally["pairwise"][i][j] for j in indices] for i in indices],
+    }
+
+
+def tally_votes(votes, options):
+    """Tally CSV vote rows (same input as parse_votes)."""
+    option_ids = [opt["id"] for opt in options]
+    tally = new_sparse_tally(len(options))
+    for vote in votes:
+        add_sparse_ballot(
+            tally,
+            [
+                (i, score)
+                for i, score in enumerate(vote_scores(vote, option_ids))
+                if score
+            ],
+        )
+    return finish_sparse_tally(tally)
+
+
+def tally_preferences(tally, option_names, mask=lambda x: x):
+    """The find_preferences() mapping, read off a tally. Pairs come out in
+    the same order find_preferences produces them, which kemeny_young's
+    tie-breaking depends on."""
+    n = len(option_names)
+    pairwise = tally["pairwise"]
+    return {
+        (mask(option_names[i]), mask(option_names[j])): pairwise[i][j]
+        for i in range(n)
+        for j in range(n)
+        if i != j
+    }
+
+
+def score_voting_from_tally(tally, option_names):
+    totals = dict(zip(option_names, tally["totals"]))
+    return sorted(totals.items(), reverse=True, key=lambda x: x[1])
+
+
+def schulze_method_from_tally(tally, option_names):
+    strengths = schulze_path_strengths(tally_margins(tally))
+    return _schulze_order(
+        lambda a, b: strengths[a][b] >= strengths[b][a], tally, option_names
+    )
+
+
+def borda_count_from_tally(tally, option_names):
+    # borda_count sorts each ballot (stably) by score and gives the option in
+    # position p n-1-p points, so an option's points on a ballot are n-1
+    # minus the options scored above it, minus the options tied with it that
+    # come earlier in the option list. All of those are pairwise counts.
+    n = len(option_names)
+    count = tally["count"]
+    pairwise = tally["pairwise"]
+    totals = {}
+    for x, name in enumerate(option_names):
+        points = count * (n - 1)
+        for y in range(n):
+            if y == x:
+                continue
+            points -= pairwise[y][x]
+            if y < x:
+                points -= count - pairwise[x][y] - pairwise[y][x]
+        totals[name] = points
+    return sorted(totals.items(), reverse=True, key=lambda x: x[1])
+
+
+def star_voting_from_tally(tally, option_names):
+    index = {name: i for i, name in enumerate(option_names)}
+    pairwise = tally["pairwise"]
+
+    def head_to_head(A, B):
+        return pairwise[index[A]][index[B]], pairwise[index[B]][index[A]]
+
+    return _star_runoff(score_voting_from_tally(tally, option_names), head_to_head)
+
+
+def kemeny_young_from_tally(
+    tally, option_names, brute_force=False, progress=None, seed=None
+):
+    return _kemeny_young_ranking(
+        tally_preferences(tally, option_names, mask=option_names.index),
+        option_names,
+        brute_force,
+        progress,
+        seed,
+    )
+
+
+# ============== INCREMENTAL SCHULZE ==============
+#
+# Schulze's path strengths are max-min (widest) paths over the margin matrix.
+# If no margin moves by more than Δ, no path's weakest link does either, so
+# no path strength moves by more than Δ — one extra ballot is Δ = 1.
+# DynamicSchulze uses that to avoid the O(N³) recompute: it keeps the old
+# strengths plus, per row, how far they might have drifted ("slack"), and
+# only recomputes (exactly, O(N²) per row) the rows of pairs whose
+# comparison the slack leaves in doubt.
+
+
+def tally_margins(tally):
+    """margins[i][j] = ballots preferring option i to j minus the reverse."""
+    pairwise = tally["pairwise"]
+    n = len(pairwise)
+    return [[pairwise[i][j] - pairwise[j][i] for j in range(n)] for i in range(n)]
+
+
+def schulze_path_strengths(margins):
+    """Floyd-Warshall widest paths, same recurrence as schulze_method."""
+    n = len(margins)
+    strengths = [row[:] for row in margins]
+    for k in range(n):
+        row_k = strengths[k]
+        for i in range(n):
+            if i == k:
+                continue
+            row_i = strengths[i]
+            s_ik = row_i[k]
+            for j in range(n):
+                if j != k and j != i:
+                    via = s_ik if s_ik < row_k[j] else row_k[j]
+                    if via > row_i[j]:
+                        row_i[j] = via
+    return strengths
+
+
+def _widest_paths_from(source, margins):
+    """One row of schulze_path_strengths, by the widest-path variant of
+    Dijkstra's algorithm. O(N²)."""
+    n = len(margins)
+    best = list(margins[source])
+    done = [False] * n
+    done[source] = True
+    for _ in range(n - 1):
+        u = max((v for v in range(n) if not done[v]), key=best.__getitem__)
+        done[u] = True
+        best_u = best[u]
+        row_u = margins[u]
+        for v in range(n):
+            if not done[v]:
+                via = best_u if best_u < row_u[v] else row_u[v]
+                if via > best[v]:
+                    best[v] = via
+    best[source] = margins[source][source]
+    return best
+
+
+def _schulze_order(beats_or_ties, tally, option_names):
+    """Final Schulze ordering: options ranked by how many others they beat or
+    tie (`beats_or_ties(a, b)` on option indexes), ties broken by total score."""
+    n = len(option_names)
+    ranking = {
+        option_names[a]: sum(1 for b in range(n) if b != a and beats_or_ties(a, b))
+        for a in range(n)
+    }
+    return _sort_with_total_scores(
+        dict(zip(option_names, tally["totals"])),
+        sorted(ranking.items(), reverse=True, key=lambda x: x[1]),
+    )
+
+
+def _run_inline_strengths(fn, margins):
+    return fn(margins)
+
+
+class DynamicSchulze:
+    """Schulze method that carries its path-strength matrix from one call to
+    the next and repairs it instead of recomputing it.
+
+    `rank(tally, option_names)` returns the same thing as
+    schulze_method_from_tally. Pass `full_recompute(fn, margins)` to control
+    where the occasional full Floyd-Warshall runs (e.g. a worker process);
+    by default it runs inline. Not thread-safe: callers serialize access.
+    """
+
+    def __init__(self, repair_limit=0.5):
+        # Recompute everything once more than this fraction of rows is in
+        # doubt; N single-row repairs cost about as much as Floyd-Warshall.
+        self.repair_limit = repair_limit
+        self.option_names = None
+        self.margins = None
+        self.strengths = None
+        self.slack = None
+        self.full_recomputes = 0
+        self.rows_repaired = 0
+
+    def rank(self, tally, option_names, full_recompute=None):
+        margins = tally_margins(tally)
+        n = len(margins)
+        if self.strengths is None or self.option_names != list(option_names):
+            self._recompute(margins, full_recompute)
+            self.option_names = list(option_names)
+        else:
+            self._repair(margins, full_recompute)
+        strengths = self.strengths
+        return _schulze_order(
+            lambda a, b: strengths[a][b] >= strengths[b][a], tally, option_names
+        )
+
+    def _recompute(self, margins, full_recompute):
+        run = full_recompute or _run_inline_strengths
+        self.strengths = run(schulze_path_strengths, margins)
+        self.margins = margins
+        self.slack = [0] * len(margins)
+        self.full_recomputes += 1
+
+    def _doubtful(self, a, b):
+        """Could the true strengths disagree with the stored ones about
+        whether a beats-or-ties b, or b beats-or-ties a?"""
+        s_ab = self.strengths[a][b]
+        s_ba = self.strengths[b][a]
+        slack = self.slack[a] + self.slack[b]
+        # Certain only if the gap is wider than the combined drift.
+        return abs(s_ab - s_ba) <= slack and slack > 0
+
+    def _repair(self, margins, full_recompute):
+        n = len(margins)
+        old = self.margins
+        drift = max(
+            (abs(margins[i][j] - old[i][j]) for i in range(n) for j in range(n)),
+            default=0,
+        )
+        if not drift:
+            return
+        self.margins = margins
+        self.slack = [s + drift for s in self.slack]
+        rows = set()
+        for a in range(n):
+            for b in range(a + 1, n):
+                if self._doubtful(a, b):
+                    rows.add(a)
+                    rows.add(b)
+        if len(rows) > self.repair_limit * n:
+            self._recompute(margins, full_recompute)
+            return
+        for row in rows:
+            self.strengths[row] = _widest_paths_from(row, margins)
+            self.slack[row] = 0
+        self.rows_repaired += len(rows)
+
+
 # ============== MAIN ENTRY ==============
 
 
-def calculate_all_results(votes, options, max_score):
-    """Calculate results for all voting methods"""
+# calculate_all_results runs these in order; the keys are what templates use.
+METHODS = {
+    "score_voting": score_voting,
+    "schulze_method": schulze_method,
+    "borda_count": borda_count,
+    "star_voting": star_voting,
+    "kemeny_young": kemeny_young,
+}
+
+# Same keys, computed from a tally instead of parsed votes.
+TALLY_METHODS = {
+    "score_voting": score_voting_from_tally,
+    "schulze_method": schulze_method_from_tally,
+    "borda_count": borda_count_from_tally,
+    "star_voting": star_voting_from_tally,
+    "kemeny_young": kemeny_young_from_tally,
+}
+
+# Returned by a `run_method` hook in place of a method's result when it gave
+# up on it (see executor.py). The method is then listed under
+# results["timed_out"] and its own entry is left empty.
+TIMED_OUT = "timed out"
+
+
+def _run_inline(name, method, data, option_names):
+    return method(data, option_names)
+
+
+def _run_methods(methods, data, option_names, run_method):
+    run = run_method or _run_inline
+    results = {}
+    timed_out = []
+    for name, method in methods.items():
+        outcome = run(name, method, data, option_names)
+        if outcome == TIMED_OUT:
+            timed_out.append(name)
+            outcome = []
+        results[name] = outcome
+    results["kemeny_young"] = [
+        (k, round_to_significant_digits(str(v), 3))
+        for (k, v) in results["kemeny_young"]
+    ]
+    if timed_out:
+        results["timed_out"] = timed_out
+    return results
+
+
+def calculate_all_results(votes, options, max_score, run_method=None):
+    """Calculate results for all voting methods.
+
+    `run_method(name, method, data, option_names)` lets the caller decide
+    where each method runs (e.g. in a worker process with a time limit); it
+    must return `method(data, option_names)` or TIMED_OUT."""
     if not votes or not options:
         return {}
 
     option_names = [o["name"] for o in options]
     parsed = parse_votes(votes, options)
+    return _run_methods(METHODS, parsed, option_names, run_method)
 
-    return {
-        "score_voting": score_voting(parsed, option_names),
-        "schulze_method": schulze_method(parsed, option_names),
-        "borda_count": borda_count(parsed, option_names),
-        "star_voting": star_voting(parsed, option_names),
-        "kemeny_young": [
-            (k, round_to_significant_digits(str(v), 3))
-            for (k, v) in kemeny_young(parsed, option_names)
-        ],
-    }
+
+def calculate_results_from_tally(tally, options, run_method=None, methods=None):
+    """calculate_all_results for ballots that have already been tallied.
+    `methods` overrides entries of TALLY_METHODS (e.g. a DynamicSchulze)."""
+    if not tally["count"] or not options:
+        return {}
+
+    option_names = [o["name"] for o in options]
+    return _run_methods(
+        dict(TALLY_METHODS, **(methods or {})), tally, option_names, run_method
+    )
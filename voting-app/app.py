@@ -1,13 +1,65 @@
 import csv
+import hashlib
+import io
+import json
+import math
 import os
 import secrets
+import shutil
 import threading
+from collections import OrderedDict
+from functools import partial
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from algorithms import calculate_all_results
-from flask import Flask, abort, redirect, render_template, request, session, url_for
-from werkzeug.security import check_password_hash, generate_password_hash
+from algorithms import (
+    METHODS,
+    SCORES_FIELD,
+    TIMED_OUT,
+    DynamicSchulze,
+    calculate_results_from_tally,
+    vote_scores,
+    encode_scores,
+    kemeny_young_from_tally,
+    merge_tallies,
+    new_tally,
+    subset_tally,
+)
+from assets import StaticAssets
+from broadcast import Broadcaster, sse_event
+from executor import MethodExecutor, MethodTimeout
+from jobs import JobQueue
+from scheduler import ResultsScheduler
+from singleflight import SingleFlight
+from fileindex import IndexCache
+from fragments import FragmentCache
+from hashing import HasherBusy, PasswordHasher
+from pollindex import STATUSES, PollIndex
+from ratelimit import RateLimiter
+from userindex import UserIndex
+from voters import VoteCount, VoterIndex
+from tally import (
+    StaleVotesFile,
+    iter_lines,
+    read_sidecar,
+    tally_file,
+    write_sidecar,
+)
+import click
+from flask import (
+    Flask,
+    Response,
+    abort,
+    g,
+    has_app_context,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
+from markupsafe import Markup
 
 app = Flask(__name__)
 
@@ -92,6 +144,84 @@ def _csrf_protect():
     if not expected or not secrets.compare_digest(expected, submitted):
         abort(400, description="CSRF token missing or invalid")
 
+# ============== STATIC ASSETS ==============
+#
+# url_for('static', filename=...) links to a content-fingerprinted name
+# (see assets.py), and those names are served with a year-long immutable
+# Cache-Control plus a pregenerated gzip variant when the client accepts
+# it. Unfingerprinted names still work, with Flask's default caching.
+
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+static_assets = StaticAssets(app.static_folder)
+static_assets.refresh()
+
+
+@app.url_defaults
+def _fingerprint_static_urls(endpoint, values):
+    if endpoint == "static" and "filename" in values:
+        if app.debug:
+            static_assets.refresh()
+        values["filename"] = static_assets.url_name(values["filename"])
+
+
+def serve_static(filename):
+    asset = static_assets.get(filename)
+    if asset is None:
+        return app.send_static_file(filename)
+    gzipped = (
+        asset.gzipped is not None and request.accept_encodings.quality("gzip") > 0
+    )
+    response = Response(
+        asset.gzipped if gzipped else asset.data, mimetype=asset.mimetype
+    )
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+    response.set_etag(f"{asset.etag}-gz" if gzipped else asset.etag)
+    return response.make_conditional(request)
+
+
+app.view_functions["static"] = serve_static
+
+
+# ============== RATE LIMITING ==============
+#
+# POSTs to the endpoints below go through a per-client token bucket (see
+# ratelimit.py) before anything else happens, so a client hammering them is
+# turned away with a 429 before any CSV access or password hashing. Clients
+# are told apart by request.remote_addr; behind a reverse proxy, wrap the
+# app in werkzeug's ProxyFix so that is the real client address. Like CSRF,
+# limiting is off under TESTING unless RATELIMIT_ENABLED is set.
+
+# endpoint -> (tokens refilled per second, burst size)
+RATE_LIMITS = {
+    "vote": (0.5, 10),
+    "admin_login": (0.2, 5),
+    "signup": (0.02, 3),
+}
+RATE_LIMIT_MAX_CLIENTS = 100_000
+
+rate_limiter = RateLimiter(max_keys=RATE_LIMIT_MAX_CLIENTS)
+
+
+@app.before_request
+def _rate_limit():
+    if request.method != "POST" or request.endpoint not in RATE_LIMITS:
+        return
+    if not app.config.get("RATELIMIT_ENABLED", not app.config.get("TESTING")):
+        return
+    rate, burst = RATE_LIMITS[request.endpoint]
+    wait = rate_limiter.hit(request.endpoint, request.remote_addr, rate, burst)
+    if wait:
+        return (
+            "Too many requests. Please slow down.",
+            429,
+            {"Retry-After": str(math.ceil(wait))},
+        )
+
+
 # ============== CSV GARBAGE ==============
 
 # A re-entrant lock that serializes ALL CSV access so the read-modify-write
@@ -111,12 +241,27 @@ def csv_lock():
         yield
 
 
-def read_csv(filepath):
+def iter_csv(filepath):
+    """Yield the rows of a CSV file one dict at a time, so big files never
+    have to fit in memory.
+
+    Only opening the file happens under the lock. The rows are the ones
+    that were in the file at that moment (reading stops at the size it had
+    then, and write_csv swaps in a new file rather than changing this one),
+    so callers can take as long as they like without holding it.
+    """
     with _csv_lock:
-        if not os.path.exists(filepath):
-            return []
-        with open(filepath, "r", newline="", encoding="utf-8") as f:
-            return list(csv.DictReader(f))
+        try:
+            f = open(filepath, "rb")
+        except FileNotFoundError:
+            return
+        size = os.fstat(f.fileno()).st_size
+    with f:
+        yield from csv.DictReader(iter_lines(f, size))
+
+
+def read_csv(filepath):
+    return list(iter_csv(filepath))
 
 
 def write_csv(filepath, rows, fieldnames):
@@ -126,18 +271,29 @@ def write_csv(filepath, rows, fieldnames):
     adding new columns to existing files); `extrasaction="ignore"` silently
     drops keys that aren't in `fieldnames` so a stale row dict doesn't blow
     up the writer.
+
+    The file is written to a temp name and renamed into place, so anyone
+    still reading the old file (e.g. a results tally running outside the
+    lock) keeps seeing the old contents rather than a half-written new one.
     """
     with _csv_lock:
-        with open(filepath, "w", newline="", encoding="utf-8") as f:
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
             writer = csv.DictWriter(
                 f, fieldnames=fieldnames, restval="", extrasaction="ignore"
             )
             writer.writeheader()
             writer.writerows(rows)
+        os.replace(tmp_path, filepath)
 
 
 def append_csv(filepath, row, fieldnames):
     """Append single row to CSV, create if needed."""
+    append_csv_rows(filepath, [row], fieldnames)
+
+
+def append_csv_rows(filepath, rows, fieldnames):
+    """Append many rows to CSV in one write, create if needed."""
     with _csv_lock:
         file_exists = os.path.exists(filepath)
         with open(filepath, "a", newline="", encoding="utf-8") as f:
@@ -146,7 +302,20 @@ def append_csv(filepath, row, fieldnames):
             )
             if not file_exists:
                 writer.writeheader()
-            writer.writerow(row)
+            writer.writerows(rows)
+
+
+def caught_up(index):
+    """Refresh a FileIndex (see fileindex.py) to its file as it is now, and
+    return it. The stat happens under the lock so it never ends in the
+    middle of a row; the index reads up to it without holding the lock."""
+    with _csv_lock:
+        try:
+            stat = os.stat(index.path)
+        except FileNotFoundError:
+            stat = None
+    index.refresh(stat)
+    return index
 
 
 # ============== POLL GARBAGE ==============
@@ -176,38 +345,625 @@ def get_polls():
     return read_csv(f"{DATA_DIR}/polls.csv")
 
 
+# A single PollIndex of polls.csv (see pollindex.py) for poll lookups, the
+# dashboard and the per-owner poll counts.
+_poll_indexes = IndexCache(PollIndex, 1)
+
+
+def poll_index():
+    return caught_up(_poll_indexes.get("polls", f"{DATA_DIR}/polls.csv"))
+
+
 def get_poll(poll_id):
-    polls = get_polls()
-    return next((p for p in polls if p["id"] == poll_id), None)
+    return poll_index().get(poll_id)
 
 
 def get_options(poll_id):
     return read_csv(f"{DATA_DIR}/options_{poll_id}.csv")
 
 
+def iter_votes(poll_id):
+    return iter_csv(f"{DATA_DIR}/votes_{poll_id}.csv")
+
+
 def get_votes(poll_id):
-    return read_csv(f"{DATA_DIR}/votes_{poll_id}.csv")
+    return list(iter_votes(poll_id))
+
+
+def votes_fieldnames(poll_id):
+    """Columns of votes_<poll_id>.csv: its own header if it exists (polls
+    from before sparse ballots have one option_<id> column per option),
+    otherwise the sparse layout (see algorithms.SCORES_FIELD)."""
+    try:
+        path = f"{DATA_DIR}/votes_{poll_id}.csv"
+        with open(path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), None)
+    except FileNotFoundError:
+        header = None
+    return header or ["username", "submitted_at", SCORES_FIELD]
+
+
+def validate_score(raw, opt, max_score):
+    """Return (score, None) if `raw` is a valid score for option `opt`,
+    else (None, error message). `raw` must be a whole number: a form or CSV
+    string of digits, or a JSON integer (not a float or a boolean, which
+    int() would quietly turn into one)."""
+    if isinstance(raw, int) and not isinstance(raw, bool):
+        score = raw
+    elif isinstance(raw, str) and raw.strip().isdecimal():
+        score = int(raw)
+    else:
+        return None, f"Invalid score for '{opt['name']}'"
+    if not (0 <= score <= max_score):
+        return None, f"Score for '{opt['name']}' must be between 0 and {max_score}"
+    return score, None
+
+
+def score_columns(scores, fieldnames):
+    """{option id: score} as the columns of a votes file with `fieldnames`
+    (see votes_fieldnames)."""
+    if SCORES_FIELD in fieldnames:
+        return {SCORES_FIELD: encode_scores(scores)}
+    return {f"option_{opt_id}": str(score) for opt_id, score in scores.items()}
+
+
+def forget_request_cache():
+    """Drop what current_user/user_poll_count remembered for this request.
+    Called by every write to users.csv or polls.csv."""
+    if has_app_context():
+        g.pop("current_user", None)
+        g.pop("poll_counts", None)
 
 
 def save_polls(polls):
     write_csv(f"{DATA_DIR}/polls.csv", polls, POLLS_FIELDS)
+    forget_request_cache()
 
 
 def generate_id():
     return secrets.token_urlsafe(6)
 
 
-def user_poll_count(username):
+def poll_data_version(poll_id):
+    """Cheap token that changes whenever a poll's votes change.
+
+    Built from the votes file's size and mtime (so it survives restarts and
+    notices edits made by other processes) plus an in-process generation
+    counter bumped by `mark_poll_changed` (so two rewrites landing in the
+    same filesystem timestamp tick still get distinct versions). Never
+    reads the file itself.
+    """
+    generation = _poll_generations.get(poll_id, 0)
+    try:
+        st = os.stat(f"{DATA_DIR}/votes_{poll_id}.csv")
+    except FileNotFoundError:
+        return f"0-0-{generation}"
+    return f"{st.st_size:x}-{st.st_mtime_ns:x}-{generation}"
+
+
+_poll_generations = {}
+
+
+def mark_poll_changed(poll_id):
+    """Call after ANY write to votes_<poll_id>.csv so cached results get
+    refreshed."""
+    with _csv_lock:
+        _poll_generations[poll_id] = _poll_generations.get(poll_id, 0) + 1
+    results_scheduler.notify(poll_id)
+
+
+def user_poll_count(username, refresh=False):
     """Return how many polls a given user owns. Used to enforce the
-    MAX_POLLS_PER_USER limit on non-admin accounts."""
+    MAX_POLLS_PER_USER limit on non-admin accounts. Counted at most once
+    per request, like current_user; pass `refresh` to recount (e.g. under
+    the lock, where another request may have just added one)."""
     if not username:
         return 0
-    return sum(1 for p in get_polls() if p.get("owner") == username)
+    counts = g.setdefault("poll_counts", {})
+    if refresh or username not in counts:
+        counts[username] = poll_index().count(owner=username)
+    return counts[username]
+
+
+# ============== RESULTS ==============
+
+# Results are recomputed in the background by `results_scheduler` rather
+# than on every page view: `vote` and `delete_vote` call
+# `mark_poll_changed`, and readers are served the last published snapshot
+# even if it's a few votes behind. Set RESULTS_DEBOUNCE_SECONDS=0 to go
+# back to always-fresh (recompute-on-read) results.
+try:
+    RESULTS_DEBOUNCE_SECONDS = max(
+        0.0, float(os.environ.get("RESULTS_DEBOUNCE_SECONDS", "2"))
+    )
+except ValueError:
+    RESULTS_DEBOUNCE_SECONDS = 2.0
+
+
+# Kemeny-Young (and Schulze on big polls) run in a process pool so they don't
+# hold the GIL against every other request thread, and get killed if they
+# take longer than RESULTS_METHOD_TIMEOUT_SECONDS. Small polls stay inline:
+# shipping them to another process costs more than computing them.
+# RESULTS_POOL_WORKERS=0 disables the pool entirely.
+try:
+    RESULTS_POOL_WORKERS = max(0, int(os.environ.get("RESULTS_POOL_WORKERS", "2")))
+except ValueError:
+    RESULTS_POOL_WORKERS = 2
+try:
+    RESULTS_METHOD_TIMEOUT_SECONDS = max(
+        0.1, float(os.environ.get("RESULTS_METHOD_TIMEOUT_SECONDS", "10"))
+    )
+except ValueError:
+    RESULTS_METHOD_TIMEOUT_SECONDS = 10.0
+
+# method name -> minimum option count at which it's sent to the pool.
+OFFLOADED_METHODS = {"kemeny_young": 5}
+# Schulze is repaired incrementally in-process (see _poll_schulze); only its
+# occasional full recompute goes to the pool, from this many options up.
+SCHULZE_OFFLOAD_MIN_OPTIONS = 25
+
+method_executor = MethodExecutor(
+    max_workers=max(1, RESULTS_POOL_WORKERS), timeout=RESULTS_METHOD_TIMEOUT_SECONDS
+)
+
+
+def run_results_method(name, method, tally, option_names, progress=None):
+    """`run_method` hook for calculate_results_from_tally (see
+    OFFLOADED_METHODS). `progress` is passed on to kemeny_young, whether it
+    runs in-process or in the pool."""
+    min_options = OFFLOADED_METHODS.get(name)
+    if name != "kemeny_young":
+        progress = None
+    try:
+        if (
+            not RESULTS_POOL_WORKERS
+            or min_options is None
+            or len(option_names) < min_options
+        ):
+            if progress:
+                return method(tally, option_names, progress=progress)
+            return method(tally, option_names)
+        return method_executor.run(method, tally, option_names, progress=progress)
+    except MethodTimeout as e:
+        print(f"⚠️  {e}; showing it as timed out.")
+        return TIMED_OUT
+
+
+# One DynamicSchulze per recently-computed poll, so a recompute after a few
+# new votes only repairs the path strengths those votes could have changed.
+# Each holds an N×N matrix, so only the most recent SCHULZE_ENGINE_CACHE_SIZE
+# polls keep theirs.
+SCHULZE_ENGINE_CACHE_SIZE = 256
+_schulze_engines = OrderedDict()  # poll_id -> (DynamicSchulze, Lock)
+_schulze_engines_lock = threading.Lock()
+
+
+def _offload_schulze_recompute(fn, margins):
+    return method_executor.run(fn, margins)
+
+
+def _poll_schulze(poll_id):
+    """A drop-in for schulze_method_from_tally backed by the poll's engine."""
+    with _schulze_engines_lock:
+        entry = _schulze_engines.get(poll_id)
+        if entry is None:
+            entry = _schulze_engines[poll_id] = (DynamicSchulze(), threading.Lock())
+        _schulze_engines.move_to_end(poll_id)
+        while len(_schulze_engines) > SCHULZE_ENGINE_CACHE_SIZE:
+            _schulze_engines.popitem(last=False)
+    engine, lock = entry
+
+    def schulze_method(tally, option_names):
+        offload = (
+            RESULTS_POOL_WORKERS
+            and len(option_names) >= SCHULZE_OFFLOAD_MIN_OPTIONS
+        )
+        with lock:
+            return engine.rank(
+                tally,
+                option_names,
+                full_recompute=_offload_schulze_recompute if offload else None,
+            )
+
+    return schulze_method
+
+
+def forget_poll_results(poll_id):
+    """Drop every cached results structure for a deleted poll."""
+    results_scheduler.discard(poll_id)
+    results_stream.close(poll_id)
+    discard_tally_sidecar(poll_id)
+    try:
+        os.remove(_kemeny_ranking_path(poll_id))
+    except FileNotFoundError:
+        pass
+    with _schulze_engines_lock:
+        _schulze_engines.pop(poll_id, None)
+    voter_indexes.discard(poll_id)
+    vote_counts.discard(poll_id)
+    results_fragments.discard(poll_id)
+
+
+# One VoterIndex per recently-viewed poll (see voters.py). Each holds every
+# voter's username, so only the most recent VOTER_INDEX_CACHE_SIZE polls
+# keep theirs. A VoteCount is just a counter, so far more polls keep one.
+VOTER_INDEX_CACHE_SIZE = 256
+VOTE_COUNT_CACHE_SIZE = 10_000
+voter_indexes = IndexCache(VoterIndex, VOTER_INDEX_CACHE_SIZE)
+vote_counts = IndexCache(VoteCount, VOTE_COUNT_CACHE_SIZE)
+
+
+def voter_index(poll_id):
+    """The poll's VoterIndex, caught up with votes_<poll_id>.csv."""
+    return caught_up(voter_indexes.get(poll_id, f"{DATA_DIR}/votes_{poll_id}.csv"))
+
+
+def poll_vote_count(poll_id):
+    """Number of ballots in votes_<poll_id>.csv, without rereading it."""
+    return len(caught_up(vote_counts.get(poll_id, f"{DATA_DIR}/votes_{poll_id}.csv")))
+
+
+def _kemeny_ranking_path(poll_id):
+    return f"{DATA_DIR}/kemeny_{poll_id}.csv"
+
+
+def _previous_kemeny_ranking(poll_id):
+    """Option names in the order of the last Kemeny-Young result, to
+    warm-start the next one (see kemeny_young's `seed`), or None.
+
+    Taken from the published snapshot, or failing that (after a restart,
+    or once the snapshot was evicted) from the ranking saved by
+    save_kemeny_ranking."""
+    snapshot = results_scheduler.latest(poll_id)
+    if snapshot:
+        ranking = snapshot["results"].get("kemeny_young")
+        if ranking and ranking != TIMED_OUT:
+            return [name for name, _ in ranking]
+    return _saved_kemeny_ranking(poll_id) or None
+
+
+def _saved_kemeny_ranking(poll_id):
+    return [row["option"] for row in read_csv(_kemeny_ranking_path(poll_id))]
+
+
+def save_kemeny_ranking(poll_id, ranking):
+    """Persist a Kemeny-Young result's order for _previous_kemeny_ranking,
+    unless that's already the saved one."""
+    if not ranking or ranking == TIMED_OUT:
+        return
+    names = [name for name, _ in ranking]
+    if names == _saved_kemeny_ranking(poll_id):
+        return
+    try:
+        write_csv(
+            _kemeny_ranking_path(poll_id),
+            [{"option": name} for name in names],
+            ["option"],
+        )
+    except OSError as e:
+        print(f"⚠️  Couldn't save Kemeny-Young ranking for poll {poll_id}: {e}")
+
+
+# Votes files at least this big are tallied in parallel chunks on the
+# results worker pool instead of in one pass on the calling thread.
+PARALLEL_TALLY_MIN_BYTES = 8 * 1024 * 1024
+
+
+def _tally_sidecar_path(poll_id):
+    return f"{DATA_DIR}/tally_{poll_id}.bin"
+
+
+def discard_tally_sidecar(poll_id):
+    """Delete a poll's saved tally. Not needed for correctness (a sidecar
+    for a rewritten votes file is ignored) but saves the disk space."""
+    try:
+        os.remove(_tally_sidecar_path(poll_id))
+    except FileNotFoundError:
+        pass
+
+
+def tally_poll_votes(poll_id, options, stat):
+    """Tally votes_<poll_id>.csv as it was when `stat` was taken (its size
+    bounds the read, its inode detects a rewrite).
+
+    Starts from the poll's tally sidecar when it matches this file, so only
+    rows appended since it was saved are read, then saves a new one."""
+    path = f"{DATA_DIR}/votes_{poll_id}.csv"
+    sidecar_path = _tally_sidecar_path(poll_id)
+    option_ids = [o["id"] for o in options]
+    saved = read_sidecar(sidecar_path, path, option_ids, stat.st_ino, stat.st_size)
+    base, start = saved if saved else (None, None)
+    unread = stat.st_size - (start or 0)
+    parallel = RESULTS_POOL_WORKERS > 1 and unread >= PARALLEL_TALLY_MIN_BYTES
+    tally = tally_file(
+        path,
+        option_ids,
+        start=start,
+        end=stat.st_size,
+        chunks=RESULTS_POOL_WORKERS if parallel else 1,
+        map_fn=method_executor.map if parallel else None,
+        inode=stat.st_ino,
+    )
+    if base is not None:
+        tally = merge_tallies(base, tally)
+    if start != stat.st_size:
+        try:
+            write_sidecar(
+                sidecar_path, path, tally, option_ids, stat.st_size, stat.st_ino
+            )
+        except OSError as e:
+            print(f"⚠️  Couldn't save tally sidecar for poll {poll_id}: {e}")
+    return tally
+
+
+def compute_results_snapshot(poll_id, run_method=run_results_method):
+    """Tally a poll from disk. Returns a snapshot dict
+    {"version", "vote_count", "results"}, or None if the poll is gone."""
+    poll = get_poll(poll_id)
+    if not poll:
+        return None
+    while True:
+        # Pin down the version, the options and exactly which bytes of the
+        # votes file they go with under the lock; the tally itself then runs
+        # outside it. Appends only add bytes past the recorded size, and a
+        # rewrite replaces the file, which the tally notices by inode.
+        with csv_lock():
+            version = poll_data_version(poll_id)
+            options = get_options(poll_id)
+            try:
+                stat = os.stat(f"{DATA_DIR}/votes_{poll_id}.csv")
+            except FileNotFoundError:
+                stat = None
+        if stat is None:
+            return {
+                "version": version,
+                "vote_count": 0,
+                "results": {},
+                "options": options,
+                "tally": new_tally(len(options)),
+            }
+        try:
+            tally = tally_poll_votes(poll_id, options, stat)
+            break
+        except StaleVotesFile:
+            continue
+    results = calculate_results_from_tally(
+        tally,
+        options,
+        run_method=run_method,
+        methods={
+            "schulze_method": _poll_schulze(poll_id),
+            "kemeny_young": partial(
+                kemeny_young_from_tally, seed=_previous_kemeny_ranking(poll_id)
+            ),
+        },
+    )
+    save_kemeny_ranking(poll_id, results.get("kemeny_young"))
+    return {
+        "version": version,
+        "vote_count": tally["count"],
+        "results": results,
+        # Kept so what-if questions about this data can be answered without
+        # touching the votes file again (see compute_subset_results).
+        "options": options,
+        "tally": tally,
+    }
+
+
+def snapshot_summary(snapshot):
+    """The parts of a snapshot worth sending to a client (the tally is
+    O(N²) and only needed server-side)."""
+    return {key: snapshot[key] for key in ("version", "vote_count", "results")}
+
+
+# Every path that computes results (inline on first view, the background
+# scheduler, API jobs) goes through here, so however many threads want the
+# same poll at the same data version, only one of them actually tallies it.
+results_flights = SingleFlight()
+
+
+def compute_results_coalesced(poll_id, run_method=run_results_method):
+    key = (poll_id, poll_data_version(poll_id))
+    return results_flights.do(
+        key, lambda: compute_results_snapshot(poll_id, run_method=run_method)
+    )
+
+
+# Live results (Server-Sent Events). Every published snapshot is turned
+# into one delta message and fanned out to the poll's viewers, so the update
+# rate is the scheduler's (one per RESULTS_DEBOUNCE_SECONDS at most) and a
+# crowd of viewers costs one tally. A viewer with more than
+# RESULTS_STREAM_QUEUE_SIZE undelivered updates is disconnected.
+RESULTS_STREAM_QUEUE_SIZE = 16
+RESULTS_STREAM_KEEPALIVE_SECONDS = 15.0
+results_stream = Broadcaster(queue_size=RESULTS_STREAM_QUEUE_SIZE)
+
+
+def results_delta(previous, snapshot):
+    """What changed between two snapshots: the methods whose results differ
+    (all of them if there's no previous one) and any that went away."""
+    before = previous["results"] if previous else {}
+    after = snapshot["results"]
+    return {
+        "version": snapshot["version"],
+        "vote_count": snapshot["vote_count"],
+        "changed": {k: v for k, v in after.items() if before.get(k) != v},
+        "removed": [k for k in before if k not in after],
+    }
+
+
+def _broadcast_results(poll_id, previous, snapshot):
+    if not results_stream.subscribers(poll_id):
+        return
+    message = sse_event(
+        "delta", results_delta(previous, snapshot), event_id=snapshot["version"]
+    )
+    results_stream.publish(poll_id, (snapshot["version"], message))
+
+
+# Published snapshots hold each poll's full tally, so only the most recently
+# viewed RESULTS_SNAPSHOT_CACHE_SIZE polls keep one; others recompute on view.
+RESULTS_SNAPSHOT_CACHE_SIZE = 256
+results_scheduler = ResultsScheduler(
+    compute_results_coalesced,
+    debounce=RESULTS_DEBOUNCE_SECONDS,
+    on_publish=_broadcast_results,
+    max_polls=RESULTS_SNAPSHOT_CACHE_SIZE,
+)
+
+
+def results_version_to_serve(poll_id):
+    """The version of the snapshot get_results_snapshot would return right
+    now, found without reading or computing anything (so a conditional GET
+    can be answered from it). Queues a recompute if the published snapshot
+    is stale."""
+    current = poll_data_version(poll_id)
+    cached = results_scheduler.latest(poll_id)
+    if cached is None or cached["version"] == current:
+        return current
+    if RESULTS_DEBOUNCE_SECONDS > 0:
+        results_scheduler.notify(poll_id)
+        return cached["version"]
+    return current
+
+
+def get_results_snapshot(poll_id):
+    """Return the results snapshot to show for a poll.
+
+    A published snapshot is returned as-is, even if stale; a stale one just
+    makes sure a background recompute is queued. Only the very first view
+    of a poll (or every view, with debouncing disabled) computes inline.
+    """
+    cached = results_scheduler.latest(poll_id)
+    if cached is not None and cached["version"] == results_version_to_serve(
+        poll_id
+    ):
+        return cached
+    snapshot = compute_results_coalesced(poll_id)
+    if snapshot is not None:
+        results_scheduler.publish(poll_id, snapshot)
+    return snapshot
+
+
+# Results jobs for the JSON API: a client asks for the results of a poll's
+# current data, gets a job id straight away and polls it. Jobs are keyed on
+# (poll id, data version), so a traffic spike coalesces onto one job.
+results_jobs = JobQueue(max_workers=2)
+
+
+def _run_results_job(poll_id, job):
+    job.progress.update(stage=None, completed=0, total=len(METHODS))
+    cached = results_scheduler.latest(poll_id)
+    if cached is not None and cached["version"] == job.key[1]:
+        job.progress["completed"] = len(METHODS)
+        return snapshot_summary(cached)
+
+    def report_states(explored):
+        job.progress["kemeny_states_explored"] = explored
+
+    def run_method(name, method, tally, option_names):
+        job.progress["stage"] = name
+        outcome = run_results_method(
+            name, method, tally, option_names, progress=report_states
+        )
+        job.progress["completed"] += 1
+        return outcome
+
+    snapshot = compute_results_coalesced(poll_id, run_method=run_method)
+    if snapshot is None:
+        raise LookupError("Poll not found")
+    # If this job joined a computation someone else had already started,
+    # our run_method never ran; the work is done either way.
+    job.progress.update(stage=None, completed=len(METHODS))
+    results_scheduler.publish(poll_id, snapshot)
+    return snapshot_summary(snapshot)
+
+
+def submit_results_job(poll_id):
+    key = (poll_id, poll_data_version(poll_id))
+    return results_jobs.submit(key, lambda job: _run_results_job(poll_id, job))
+
+
+def compute_subset_results(poll_id, option_ids):
+    """What-if results: how the poll would have come out had only the
+    options in `option_ids` been on the ballot (e.g. a candidate withdrew).
+
+    Answered from the cached snapshot's tally, which is sliced rather than
+    recomputed, so no ballots are re-read. Returns None if the poll is gone
+    and raises ValueError for an empty selection or an unknown option id.
+    """
+    snapshot = get_results_snapshot(poll_id)
+    if snapshot is None:
+        return None
+    options = snapshot["options"]
+    wanted = set(option_ids)
+    unknown = wanted - {o["id"] for o in options}
+    if unknown:
+        raise ValueError(f"Unknown option id(s): {', '.join(sorted(unknown))}")
+    if not wanted:
+        raise ValueError("Pick at least one option")
+    # Keep the poll's own option order whatever order the ids came in.
+    indices = [i for i, o in enumerate(options) if o["id"] in wanted]
+    subset = [options[i] for i in indices]
+    return {
+        "version": snapshot["version"],
+        "vote_count": snapshot["vote_count"],
+        "option_ids": [o["id"] for o in subset],
+        "results": calculate_results_from_tally(
+            subset_tally(snapshot["tally"], indices),
+            subset,
+            run_method=run_results_method,
+        ),
+    }
 
 
 # ============== USERS ==============
 
-USERS_FIELDS = ["username", "password_hash", "is_admin", "created_at"]
+# Password hashing and checking run on `password_hasher`'s own small thread
+# pool (see hashing.py), never under the CSV lock. At most
+# PASSWORD_HASH_MAX_PENDING hashes wait or run at once; past that the
+# request gets a 503 straight away. Hashes made with other parameters than
+# PASSWORD_HASH_METHOD are upgraded the next time their user logs in.
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+try:
+    PASSWORD_HASH_WORKERS = max(1, int(os.environ.get("PASSWORD_HASH_WORKERS", "2")))
+except ValueError:
+    PASSWORD_HASH_WORKERS = 2
+try:
+    PASSWORD_HASH_MAX_PENDING = max(
+        1, int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "32"))
+    )
+except ValueError:
+    PASSWORD_HASH_MAX_PENDING = 32
+
+password_hasher = PasswordHasher(
+    method=PASSWORD_HASH_METHOD,
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+)
+
+
+@app.errorhandler(HasherBusy)
+def _hasher_busy(e):
+    return (
+        "The server is busy signing people in. Please try again in a moment.",
+        503,
+        {"Retry-After": "1"},
+    )
+
+
+# users.csv is a log rather than a table, so creating a user, changing a
+# password or deleting an account appends one row instead of rewriting the
+# file. Each row is a user's whole record and replaces any earlier one for
+# the same username, except rows whose "op" is "delete", which remove it.
+# Files from before the log have no "op" column; they are rewritten with
+# one before the first append.
+USERS_FIELDS = ["username", "password_hash", "is_admin", "created_at", "op"]
+
+# users.csv is compacted (rewritten with just the live users) once it holds
+# at least this many superseded or deleted rows, and at least as many of
+# them as live users, so compaction costs O(1) per appended row.
+USERS_COMPACT_MIN_RECORDS = 1000
 
 
 def _users_path():
@@ -215,44 +971,86 @@ def _users_path():
 
 
 def get_users():
-    return read_csv(_users_path())
+    return user_index().users()
+
+
+# A single UserIndex of users.csv (see userindex.py).
+_user_indexes = IndexCache(UserIndex, 1)
+
+
+def user_index():
+    return caught_up(_user_indexes.get("users", _users_path()))
 
 
 def get_user(username):
     if not username:
         return None
-    return next((u for u in get_users() if u["username"] == username), None)
+    return user_index().get(username)
 
 
 def save_users(users):
+    """Rewrite users.csv with exactly `users` (this is also how the log is
+    compacted)."""
     write_csv(_users_path(), users, USERS_FIELDS)
+    forget_request_cache()
+
+
+def append_user_records(records):
+    """Append records to the users.csv log (see USERS_FIELDS), compacting
+    it when enough of it is dead."""
+    with csv_lock():
+        index = user_index()
+        if index.fieldnames is not None and "op" not in index.fieldnames:
+            save_users(index.users())  # pre-log file; add the "op" column
+        append_csv_rows(_users_path(), records, USERS_FIELDS)
+        forget_request_cache()
+        index = user_index()
+        if index.dead_records() >= max(USERS_COMPACT_MIN_RECORDS, len(index)):
+            save_users(index.users())
 
 
 def add_user(username, password, is_admin_flag=False):
     """Append a new user. Returns True on success, False if the username
     is already taken (callers should validate format/length first)."""
+    if username in user_index():
+        return False
+    password_hash = password_hasher.hash(password)
     with csv_lock():
-        users = get_users()
-        if any(u["username"] == username for u in users):
+        if username in user_index():
             return False
-        users.append(
-            {
-                "username": username,
-                "password_hash": generate_password_hash(password),
-                "is_admin": "true" if is_admin_flag else "false",
-                "created_at": datetime.now().isoformat(),
-            }
+        append_user_records(
+            [
+                {
+                    "username": username,
+                    "password_hash": password_hash,
+                    "is_admin": "true" if is_admin_flag else "false",
+                    "created_at": datetime.now().isoformat(),
+                }
+            ]
         )
-        save_users(users)
         return True
 
 
+def set_password_hash(username, password_hash, replacing=None):
+    """Record a new password hash for `username`. With `replacing`, only if
+    the stored hash is still that one (so a background upgrade never undoes
+    a password change that raced it)."""
+    with csv_lock():
+        record = get_user(username)
+        if record is None:
+            return
+        if replacing is not None and record["password_hash"] != replacing:
+            return
+        record["password_hash"] = password_hash
+        append_user_records([record])
+
+
 def seed_first_admin():
     """If users.csv is empty, create a starter admin so the app is usable
     out of the box. The credentials come from FLASK_ADMIN_USER /
     FLASK_ADMIN_PASS env vars (defaulting to admin/admin) — print a loud
     warning so operators know to change them."""
-    if get_users():
+    if len(user_index()):
         return
     add_user(ADMIN_USER, ADMIN_PASS, is_admin_flag=True)
     if ADMIN_PASS == "admin":
@@ -271,7 +1069,13 @@ seed_first_admin()
 
 
 def current_user():
-    return get_user(session.get("admin_username"))
+    """The logged-in user's row. Loaded at most once per request (kept on
+    flask.g until something writes users.csv; see forget_request_cache)."""
+    username = session.get("admin_username")
+    cached = g.get("current_user")
+    if cached is None or cached[0] != username:
+        cached = g.current_user = (username, get_user(username))
+    return cached[1]
 
 
 def is_admin():
@@ -313,7 +1117,11 @@ def admin_login():
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
         user = get_user(username)
-        if user and check_password_hash(user.get("password_hash", ""), password):
+        if user and password_hasher.verify(user.get("password_hash", ""), password):
+            if password_hasher.needs_rehash(user["password_hash"]):
+                set_password_hash(
+                    username, password_hasher.hash(password), user["password_hash"]
+                )
             session.clear()
             session["admin_username"] = username
             return redirect(url_for("admin_dashboard"))
@@ -363,17 +1171,29 @@ def admin_logout():
 # ============== USER MANAGEMENT ROUTES ==============
 
 
+# Users listed per page on the admin user list.
+USERS_PAGE_SIZE = 50
+
+
 @app.route("/admin/users")
 def admin_users():
     if not is_admin():
         return redirect(url_for("admin_login"))
-    users = get_users()
+    page = max(1, request.args.get("page", 1, type=int))
+    q = request.args.get("q", "").strip()
+    users, total = user_index().page(page, USERS_PAGE_SIZE, q)
     # Don't leak hashes into the template context.
     safe_users = [
         {k: v for k, v in u.items() if k != "password_hash"} for u in users
     ]
     return render_template(
-        "admin_users.html", users=safe_users, current=current_user()
+        "admin_users.html",
+        users=safe_users,
+        current=current_user(),
+        q=q,
+        page=page,
+        pages=max(1, -(-total // USERS_PAGE_SIZE)),
+        user_total=total,
     )
 
 
@@ -420,11 +1240,14 @@ def admin_users_delete(username):
         # Refuse to lock yourself out.
         return redirect(url_for("admin_users"))
     with csv_lock():
-        users = [u for u in get_users() if u["username"] != username]
+        index = user_index()
+        target = index.get(username)
+        if target is None:
+            return redirect(url_for("admin_users"))
         # Refuse to delete the last admin so the system can't be orphaned.
-        if not any(u.get("is_admin") == "true" for u in users):
+        if target.get("is_admin") == "true" and index.admin_count() <= 1:
             return redirect(url_for("admin_users"))
-        save_users(users)
+        append_user_records([{"username": username, "op": "delete"}])
     return redirect(url_for("admin_users"))
 
 
@@ -439,7 +1262,7 @@ def admin_change_password():
         confirm = request.form.get("confirm_password", "")
 
         error = None
-        if not check_password_hash(user["password_hash"], old):
+        if not password_hasher.verify(user["password_hash"], old):
             error = "Current password is incorrect."
         elif len(new) < MIN_PASSWORD_LEN:
             error = f"New password must be at least {MIN_PASSWORD_LEN} characters."
@@ -449,12 +1272,7 @@ def admin_change_password():
         if error:
             return render_template("admin_change_password.html", error=error)
 
-        with csv_lock():
-            users = get_users()
-            for u in users:
-                if u["username"] == user["username"]:
-                    u["password_hash"] = generate_password_hash(new)
-            save_users(users)
+        set_password_hash(user["username"], password_hasher.hash(new))
         return render_template(
             "admin_change_password.html", success="Password updated."
         )
@@ -464,25 +1282,49 @@ def admin_change_password():
 # ============== "SECURE" ROUTES ==============
 
 
+# Polls listed per page on the dashboard.
+DASHBOARD_PAGE_SIZE = 20
+
+
 @app.route("/admin/dashboard")
 def admin_dashboard():
     user = current_user()
     if not user:
         return redirect(url_for("admin_login"))
-    polls = get_polls()
-    if user.get("is_admin") != "true":
-        # Regular users see only the polls they created.
-        polls = [p for p in polls if p.get("owner") == user["username"]]
+    is_admin_user = user.get("is_admin") == "true"
+    # Regular users see only the polls they created; admins can pick an owner.
+    owner = request.args.get("owner", "").strip() if is_admin_user else user["username"]
+    status = request.args.get("status", "")
+    if status not in STATUSES:
+        status = ""
+    sort = "oldest" if request.args.get("sort") == "oldest" else "newest"
+    after = request.args.get("after") or None
+
+    index = poll_index()
+    polls, next_cursor = index.page(
+        DASHBOARD_PAGE_SIZE,
+        owner=owner or None,
+        status=status or None,
+        after=after,
+        newest_first=sort == "newest",
+    )
+    for poll in polls:
+        poll["vote_count"] = poll_vote_count(poll["id"])
+    poll_count = user_poll_count(user["username"])
     return render_template(
         "admin_dashboard.html",
         polls=polls,
         current=user,
-        is_admin=user.get("is_admin") == "true",
-        poll_count=len(polls),
+        is_admin=is_admin_user,
+        poll_count=poll_count,
         poll_limit=MAX_POLLS_PER_USER,
-        at_limit=(
-            user.get("is_admin") != "true" and len(polls) >= MAX_POLLS_PER_USER
-        ),
+        at_limit=not is_admin_user and poll_count >= MAX_POLLS_PER_USER,
+        matching=index.count(owner=owner or None, status=status or None),
+        owner=owner if is_admin_user else "",
+        status=status,
+        sort=sort,
+        after=after,
+        next_cursor=next_cursor,
     )
 
 
@@ -490,7 +1332,7 @@ ALLOWED_MAX_SCORES = {"3", "5", "10"}
 MAX_TITLE_LEN = 200
 MAX_DESCRIPTION_LEN = 1000
 MAX_OPTION_LEN = 200
-MAX_OPTIONS = 50
+MAX_OPTIONS = 500
 
 
 def _render_create_form(**ctx):
@@ -592,7 +1434,8 @@ def admin_create():
         with csv_lock():
             if (
                 not is_admin_user
-                and user_poll_count(user["username"]) >= MAX_POLLS_PER_USER
+                and user_poll_count(user["username"], refresh=True)
+                >= MAX_POLLS_PER_USER
             ):
                 return _render_create_form(
                     error=(
@@ -606,6 +1449,7 @@ def admin_create():
                     form_options=options or ["", ""],
                 )
             append_csv(f"{DATA_DIR}/polls.csv", poll, POLLS_FIELDS)
+            forget_request_cache()
             write_csv(
                 f"{DATA_DIR}/options_{poll_id}.csv",
                 option_rows,
@@ -622,6 +1466,10 @@ def admin_create():
     )
 
 
+# Voters listed per page on the admin poll page.
+VOTES_PAGE_SIZE = 50
+
+
 @app.route("/admin/poll/<poll_id>")
 def admin_poll(poll_id):
     user = current_user()
@@ -636,13 +1484,26 @@ def admin_poll(poll_id):
         return "Poll not found", 404
 
     options = get_options(poll_id)
-    votes = get_votes(poll_id)
-
-    # Calculate results using all methods
-    results = calculate_all_results(votes, options, int(poll.get("max_score", 5)))
+    page = max(1, request.args.get("page", 1, type=int))
+    q = request.args.get("q", "").strip()
+    voters, vote_total = voter_index(poll_id).page(page, VOTES_PAGE_SIZE, q)
+    votes = [
+        {"username": username, "submitted_at": submitted_at}
+        for username, submitted_at in voters
+    ]
+    snapshot = get_results_snapshot(poll_id)
 
     return render_template(
-        "admin_poll.html", poll=poll, options=options, votes=votes, results=results
+        "admin_poll.html",
+        poll=poll,
+        options=options,
+        votes=votes,
+        vote_total=vote_total,
+        q=q,
+        page=page,
+        pages=max(1, -(-vote_total // VOTES_PAGE_SIZE)),
+        results=snapshot["results"] if snapshot else {},
+        results_html=results_fragment(poll_id, snapshot) if snapshot else "",
     )
 
 
@@ -656,18 +1517,270 @@ def delete_vote(poll_id, username):
         return "Poll not found", 404
 
     with csv_lock():
-        votes = get_votes(poll_id)
-        votes = [v for v in votes if v["username"] != username]
-
-        options = get_options(poll_id)
-        fieldnames = ["username", "submitted_at"] + [
-            f"option_{o['id']}" for o in options
-        ]
-        write_csv(f"{DATA_DIR}/votes_{poll_id}.csv", votes, fieldnames)
+        votes = (v for v in iter_votes(poll_id) if v["username"] != username)
+        write_csv(
+            f"{DATA_DIR}/votes_{poll_id}.csv", votes, votes_fieldnames(poll_id)
+        )
+        discard_tally_sidecar(poll_id)
+        mark_poll_changed(poll_id)
 
     return redirect(url_for("admin_poll", poll_id=poll_id))
 
 
+# Per-row problems listed in an import report; the rest are only counted.
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+
+class MalformedUpload(ValueError):
+    """The uploaded file can't be read past `line`, so none of it is
+    imported."""
+
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+def _decoded_lines(stream):
+    """The lines of an uploaded byte stream as text (UTF-8, optional BOM),
+    raising MalformedUpload at the first line that doesn't decode."""
+    for line_no, raw in enumerate(stream, 1):
+        try:
+            line = raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise MalformedUpload(line_no, "File is not valid UTF-8") from None
+        yield line
+
+
+def iter_uploaded_ballots(upload):
+    """Yield (line number, row dict or None, parse error or None) for each
+    ballot in an uploaded CSV or NDJSON file (by extension or mimetype),
+    decoding it as it's read rather than loading it all first.
+
+    A row-level problem is yielded as its error; one that leaves the rest
+    of the file unreadable (bad UTF-8, broken CSV quoting, an oversized
+    field) raises MalformedUpload."""
+    lines = _decoded_lines(upload.stream)
+    name = (upload.filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or upload.mimetype in (
+        "application/x-ndjson",
+        "application/jsonl",
+    ):
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_no, None, "Not valid JSON"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, row, None
+    else:
+        reader = csv.DictReader(lines)
+        rows = iter(reader)
+        while True:
+            # A record that fails to parse starts on the line after the
+            # last one read.
+            start = reader.line_num + 1
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                raise MalformedUpload(start, f"Malformed CSV: {e}") from None
+            yield reader.line_num, row, None
+
+
+def parse_imported_ballot(row, columns, options, max_score):
+    """Validate one imported ballot the way `vote` validates a form.
+
+    `columns` maps the keys an upload may use for an option (its name or
+    option_<id>) to the option. Returns (username, submitted_at, scores by
+    option id); raises ValueError with a message for the report."""
+    username = str(row.get("username") or "").strip()
+    if not username:
+        raise ValueError("Username required")
+    submitted_at = row.get("submitted_at") or datetime.now().isoformat()
+    try:
+        datetime.fromisoformat(submitted_at)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid submitted_at '{submitted_at}'") from None
+    scores = {opt["id"]: 0 for opt in options}
+    for key, raw in row.items():
+        if key in ("username", "submitted_at"):
+            continue
+        opt = columns.get(key)
+        if opt is None:
+            raise ValueError(
+                "Too many fields" if key is None else f"Unknown option '{key}'"
+            )
+        if raw in ("", None):
+            continue  # left blank = not scored
+        score, error = validate_score(raw, opt, max_score)
+        if error:
+            raise ValueError(error)
+        scores[opt["id"]] = score
+    return username, submitted_at, scores
+
+
+@app.route("/admin/poll/<poll_id>/import", methods=["POST"])
+def import_ballots(poll_id):
+    """Bulk-add ballots from an uploaded CSV (a `username` column plus one
+    column per option, headed by its name or option_<id>) or NDJSON file
+    (one object per line with the same keys). Valid rows are added in one
+    write; the JSON report lists the rest. A file that can't be read to the
+    end gets a 400 and nothing is added."""
+    user = current_user()
+    if not user:
+        return redirect(url_for("admin_login"))
+    poll = get_poll(poll_id)
+    if not poll or not can_manage_poll(poll, user):
+        return "Poll not found", 404
+    upload = request.files.get("ballots")
+    if not upload:
+        return {"error": "Upload a CSV or NDJSON file as 'ballots'."}, 400
+
+    options = get_options(poll_id)
+    max_score = int(poll.get("max_score", 5))
+    columns = {o["name"]: o for o in options}
+    columns.update((f"option_{o['id']}", o) for o in options)
+
+    errors = []
+    rejected = 0
+
+    def reject(line_no, error):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"line": line_no, "error": error})
+
+    # Parse and validate without the lock; only the duplicate check against
+    # existing voters and the write need it.
+    ballots = []
+    seen = set()
+    try:
+        for line_no, row, error in iter_uploaded_ballots(upload):
+            if error is None:
+                try:
+                    ballot = parse_imported_ballot(row, columns, options, max_score)
+                except ValueError as e:
+                    error = str(e)
+            if error is None and ballot[0] in seen:
+                error = f"'{ballot[0]}' appears more than once in the upload"
+            if error is not None:
+                reject(line_no, error)
+                continue
+            seen.add(ballot[0])
+            ballots.append((line_no, *ballot))
+    except MalformedUpload as e:
+        return {
+            "error": f"Nothing was imported: line {e.line}: {e}",
+            "imported": 0,
+            "rejected": 0,
+            "errors": [{"line": e.line, "error": str(e)}],
+        }, 400
+
+    with csv_lock():
+        existing = voter_index(poll_id)
+        fieldnames = votes_fieldnames(poll_id)
+        rows = []
+        for line_no, username, submitted_at, scores in ballots:
+            if username in existing:
+                reject(line_no, f"'{username}' already voted")
+                continue
+            rows.append(
+                {
+                    "username": username,
+                    "submitted_at": submitted_at,
+                    **score_columns(scores, fieldnames),
+                }
+            )
+        if rows:
+            append_csv_rows(f"{DATA_DIR}/votes_{poll_id}.csv", rows, fieldnames)
+            mark_poll_changed(poll_id)
+
+    errors.sort(key=lambda e: e["line"])
+    return {"imported": len(rows), "rejected": rejected, "errors": errors}
+
+
+# Rows buffered per chunk of an export response.
+EXPORT_CHUNK_ROWS = 1000
+
+
+def iter_ballot_rows(poll_id, options):
+    """Every ballot with one column per option name (the shape
+    import_ballots accepts)."""
+    ids = [o["id"] for o in options]
+    names = [o["name"] for o in options]
+    for vote in iter_votes(poll_id):
+        yield {
+            "username": vote["username"],
+            "submitted_at": vote.get("submitted_at", ""),
+            **dict(zip(names, vote_scores(vote, ids))),
+        }
+
+
+def iter_result_rows(results):
+    """One row per (method, rank) of a results dict."""
+    for method, ranking in results.items():
+        if method == "timed_out":
+            continue
+        for rank, (name, value) in enumerate(ranking, 1):
+            yield {"method": method, "rank": rank, "option": name, "value": value}
+
+
+def iter_export_chunks(rows, fieldnames, fmt):
+    """Serialize `rows` as CSV or NDJSON, EXPORT_CHUNK_ROWS at a time."""
+    buf = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buf, fieldnames=fieldnames)
+        writer.writeheader()
+    for i, row in enumerate(rows, 1):
+        if writer:
+            writer.writerow(row)
+        else:
+            buf.write(json.dumps(row) + "\n")
+        if i % EXPORT_CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+@app.route("/admin/poll/<poll_id>/export/<what>.<fmt>")
+def export_poll(poll_id, what, fmt):
+    """Download a poll's ballots or results as CSV or NDJSON. The response
+    is generated as it's sent: ballots are read from the votes file a chunk
+    at a time and no lock is held while the client downloads."""
+    user = current_user()
+    if not user:
+        return redirect(url_for("admin_login"))
+    poll = get_poll(poll_id)
+    if not poll or not can_manage_poll(poll, user):
+        return "Poll not found", 404
+    if what not in ("ballots", "results") or fmt not in ("csv", "ndjson"):
+        return "Unknown export", 404
+
+    if what == "ballots":
+        options = get_options(poll_id)
+        fieldnames = ["username", "submitted_at"] + [o["name"] for o in options]
+        rows = iter_ballot_rows(poll_id, options)
+    else:
+        snapshot = get_results_snapshot(poll_id)
+        fieldnames = ["method", "rank", "option", "value"]
+        rows = iter_result_rows(snapshot["results"] if snapshot else {})
+    return Response(
+        iter_export_chunks(rows, fieldnames, fmt),
+        mimetype="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{poll_id}-{what}.{fmt}"'
+        },
+    )
+
+
 @app.route("/admin/poll/<poll_id>/toggle", methods=["POST"])
 def toggle_poll(poll_id):
     user = current_user()
@@ -709,6 +1822,7 @@ def delete_poll(poll_id):
             os.remove(options_file)
         if os.path.exists(votes_file):
             os.remove(votes_file)
+        forget_poll_results(poll_id)
 
     return redirect(url_for("admin_dashboard"))
 
@@ -739,40 +1853,31 @@ def vote(poll_id):
             )
 
         vote_row = {"username": username, "submitted_at": datetime.now().isoformat()}
+        scores = {}
 
         # Validate every score is an int in [0, max_score] BEFORE writing.
         # Without this, a non-numeric or out-of-range value crashes
         # algorithms.parse_votes (int("") -> ValueError) when results render.
         for opt in options:
             raw = request.form.get(f"score_{opt['id']}", "0")
-            try:
-                score_int = int(raw)
-            except (ValueError, TypeError):
+            score_int, error = validate_score(raw, opt, max_score)
+            if error:
                 return render_template(
                     "voting.html",
                     poll=poll,
                     options=options,
                     max_score=max_score,
-                    error=f"Invalid score for '{opt['name']}'",
+                    error=error,
                 )
-            if not (0 <= score_int <= max_score):
-                return render_template(
-                    "voting.html",
-                    poll=poll,
-                    options=options,
-                    max_score=max_score,
-                    error=f"Score for '{opt['name']}' must be between 0 and {max_score}",
-                )
-            vote_row[f"option_{opt['id']}"] = str(score_int)
+            scores[opt["id"]] = score_int
 
-        fieldnames = ["username", "submitted_at"] + [
-            f"option_{o['id']}" for o in options
-        ]
         # Hold the lock from the duplicate check through the append so two
         # simultaneous submissions for the same username can't both pass the
         # uniqueness check before either has written.
         with csv_lock():
-            if any(v["username"] == username for v in get_votes(poll_id)):
+            fieldnames = votes_fieldnames(poll_id)
+            vote_row.update(score_columns(scores, fieldnames))
+            if username in voter_index(poll_id):
                 return render_template(
                     "voting.html",
                     poll=poll,
@@ -781,6 +1886,7 @@ def vote(poll_id):
                     error="You already voted!",
                 )
             append_csv(f"{DATA_DIR}/votes_{poll_id}.csv", vote_row, fieldnames)
+            mark_poll_changed(poll_id)
 
         return redirect(url_for("results", poll_id=poll_id))
 
@@ -789,23 +1895,245 @@ def vote(poll_id):
     )
 
 
+# The rendered _results.html for each poll (see fragments.py), reused until
+# the poll's data version or the template's source changes. Only the page
+# around it (CSRF token, session bits) is rendered per request.
+RESULTS_FRAGMENT_CACHE_BYTES = 8 * 1024 * 1024
+results_fragments = FragmentCache(RESULTS_FRAGMENT_CACHE_BYTES)
+_template_hashes = {}  # template name -> (source hash, jinja uptodate())
+
+
+def template_hash(name):
+    """Hash of a template's source, re-read only when the file changes."""
+    cached = _template_hashes.get(name)
+    if cached is None or cached[1] is None or not cached[1]():
+        source, _, uptodate = app.jinja_env.loader.get_source(app.jinja_env, name)
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        cached = _template_hashes[name] = (digest, uptodate)
+    return cached[0]
+
+
+def results_fragment(poll_id, snapshot):
+    """_results.html rendered for `snapshot`, from the cache if possible."""
+    stamp = (snapshot["version"], template_hash("_results.html"))
+    return Markup(
+        results_fragments.get(
+            poll_id,
+            stamp,
+            lambda: render_template("_results.html", results=snapshot["results"]),
+        )
+    )
+
+
+# Templates the results page is rendered from; see results_etag.
+RESULTS_PAGE_TEMPLATES = ("base.html", "results.html", "_results.html")
+
+
+def results_etag(kind, poll, version):
+    """Strong validator for a results representation (`kind` is "html" or
+    "json"): it only changes with the data and the open/closed state, and
+    for HTML also with the page's templates and the static asset
+    fingerprints it links to (so a cached page never points at a stylesheet
+    name that no longer exists)."""
+    etag = f"{kind}-{version}-{'open' if poll['is_open'] == 'true' else 'closed'}"
+    if kind == "html":
+        page = "".join(template_hash(t) for t in RESULTS_PAGE_TEMPLATES)
+        page_hash = hashlib.sha256(page.encode("utf-8")).hexdigest()[:12]
+        etag = f"{etag}-{page_hash}-{static_assets.version}"
+    return etag
+
+
+def not_modified(etag):
+    """A 304 for `etag` if the request already has it, else None."""
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_validator(response, etag):
+    response = make_response(response)
+    response.set_etag(etag)
+    # Always revalidate; a 304 costs almost nothing.
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @app.route("/results/<poll_id>")
 def results(poll_id):
     poll = get_poll(poll_id)
     if not poll:
         return "Poll not found", 404
 
-    options = get_options(poll_id)
-    votes = get_votes(poll_id)
+    cached = not_modified(
+        results_etag("html", poll, results_version_to_serve(poll_id))
+    )
+    if cached:
+        return cached
+    snapshot = get_results_snapshot(poll_id)
+
+    return with_validator(
+        render_template(
+            "results.html",
+            poll=poll,
+            vote_count=snapshot["vote_count"] if snapshot else 0,
+            results=snapshot["results"] if snapshot else {},
+            results_html=results_fragment(poll_id, snapshot) if snapshot else "",
+        ),
+        results_etag("html", poll, snapshot["version"] if snapshot else None),
+    )
+
+
+@app.route("/results/<poll_id>/what-if")
+def results_what_if(poll_id):
+    poll = get_poll(poll_id)
+    if not poll:
+        return "Poll not found", 404
 
-    # Calculate results using all methods
-    results = calculate_all_results(votes, options, int(poll.get("max_score", 5)))
+    snapshot = get_results_snapshot(poll_id)
+    options = snapshot["options"] if snapshot else []
+    # The form always sends what_if, so an empty selection is told apart
+    # from a first visit (which starts with every option selected).
+    if "what_if" in request.args:
+        selected = request.args.getlist("option")
+    else:
+        selected = [o["id"] for o in options]
+
+    error = None
+    what_if = None
+    try:
+        what_if = compute_subset_results(poll_id, selected)
+    except ValueError as e:
+        error = str(e)
 
     return render_template(
-        "results.html", poll=poll, options=options, votes=votes, results=results
+        "results_what_if.html",
+        poll=poll,
+        options=options,
+        selected=selected,
+        error=error,
+        vote_count=snapshot["vote_count"] if snapshot else 0,
+        results=what_if["results"] if what_if else {},
+    )
+
+
+# ============== JSON API ==============
+
+
+def results_json(poll, snapshot):
+    return {
+        "poll_id": poll["id"],
+        "is_open": poll["is_open"] == "true",
+        **snapshot_summary(snapshot),
+    }
+
+
+@app.route("/api/polls/<poll_id>/results")
+def results_api(poll_id):
+    """Every method's results as JSON. Dashboards can poll this cheaply:
+    send back the ETag in If-None-Match and unchanged results are a 304."""
+    poll = get_poll(poll_id)
+    if not poll:
+        return {"error": "Poll not found"}, 404
+
+    cached = not_modified(
+        results_etag("json", poll, results_version_to_serve(poll_id))
+    )
+    if cached:
+        return cached
+    snapshot = get_results_snapshot(poll_id)
+    if snapshot is None:
+        return {"error": "Poll not found"}, 404
+
+    return with_validator(
+        results_json(poll, snapshot), results_etag("json", poll, snapshot["version"])
+    )
+
+
+@app.route("/api/polls/<poll_id>/results/stream")
+def results_live(poll_id):
+    """Server-Sent Events: one "snapshot" event with the current results,
+    then a "delta" event (see results_delta) each time they change."""
+    if not get_poll(poll_id):
+        return {"error": "Poll not found"}, 404
+    # Subscribe before reading the snapshot so nothing published in between
+    # is missed.
+    sub = results_stream.subscribe(poll_id)
+    snapshot = get_results_snapshot(poll_id)
+    if snapshot is None:
+        results_stream.unsubscribe(poll_id, sub)
+        return {"error": "Poll not found"}, 404
+
+    def stream():
+        try:
+            yield sse_event(
+                "snapshot", snapshot_summary(snapshot), event_id=snapshot["version"]
+            )
+            while True:
+                item = sub.get(timeout=RESULTS_STREAM_KEEPALIVE_SECONDS)
+                if sub.dropped:
+                    return
+                if item is None:
+                    # Keeps proxies from timing the connection out and lets
+                    # us notice a viewer that has gone away.
+                    yield ": keepalive\n\n"
+                elif item[0] != snapshot["version"]:
+                    yield item[1]
+        finally:
+            results_stream.unsubscribe(poll_id, sub)
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@app.route("/api/polls/<poll_id>/results/job")
+def results_job(poll_id):
+    """Start (or join) the results computation for the poll's current
+    data. Returns immediately with a job id to poll."""
+    if not get_poll(poll_id):
+        return {"error": "Poll not found"}, 404
+    job = submit_results_job(poll_id)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for("results_job_status", job_id=job.id),
+    }, 202
+
+
+@app.route("/api/polls/<poll_id>/results/subset")
+def results_subset(poll_id):
+    """What-if results for the options given as repeated ?option=<id>."""
+    if not get_poll(poll_id):
+        return {"error": "Poll not found"}, 404
+    try:
+        what_if = compute_subset_results(poll_id, request.args.getlist("option"))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if what_if is None:
+        return {"error": "Poll not found"}, 404
+    return what_if
+
+
+@app.route("/api/jobs/<job_id>")
+def results_job_status(job_id):
+    job = results_jobs.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}, 404
+    return job.to_dict()
+
+
+@app.route("/api/admin/rate-limits")
+def rate_limit_stats():
+    """Rate limiter counters for monitoring (admins only)."""
+    if not is_admin():
+        return {"error": "Admins only"}, 403
+    return {"limits": RATE_LIMITS, **rate_limiter.stats()}
+
+
 # ============== HOME ==============
 
 
@@ -814,6 +2142,128 @@ def home():
     return redirect(url_for("admin_login"))
 
 
+# ============== STATIC EXPORT ==============
+#
+# Closed polls only change if an admin deletes a vote, so their results
+# can be served as plain files. `flask --app app export-static OUT` writes
+#
+#   OUT/results/<poll_id>/index.html        the results page
+#   OUT/api/polls/<poll_id>/results.json    what /api/polls/<id>/results returns
+#   OUT/static/<name>.<hash>.<ext>[.gz]     assets, as url_for names them
+#
+# and OUT/manifest.json, which records what each poll was rendered from
+# (data version plus a hash of the templates and assets) so a rerun only
+# renders polls that changed and removes polls that were reopened or
+# deleted. Every file is written to a temp name and renamed into place, so
+# the web server never serves half a page. Point nginx at it with e.g.
+#
+#   location /results/ { root OUT; try_files $uri $uri/index.html @app; }
+#   location ~ ^/api/polls/[^/]+/results$ { root OUT; try_files $uri.json @app; }
+#   location /static/ { root OUT; gzip_static on; expires max; }
+
+STATIC_EXPORT_MANIFEST = "manifest.json"
+
+
+def _write_file_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def export_static_assets(out_dir):
+    """Write every static asset to OUT/static under its fingerprinted name
+    (see assets.py), with a .gz copy next to it for nginx's gzip_static.
+    Returns {original name: fingerprinted name}."""
+    names = {}
+    for asset in static_assets:
+        target = os.path.join(out_dir, "static", asset.url_name)
+        if not os.path.exists(target):
+            _write_file_atomic(target, asset.data)
+            if asset.gzipped is not None:
+                _write_file_atomic(f"{target}.gz", asset.gzipped)
+        names[asset.name] = asset.url_name
+    return names
+
+
+def export_static_site(out_dir):
+    """Render every closed poll into `out_dir` (see above), skipping those
+    whose files are already current. Returns (written, skipped, removed)."""
+    manifest_path = os.path.join(out_dir, STATIC_EXPORT_MANIFEST)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    assets = export_static_assets(out_dir)
+    site = hashlib.sha256(
+        json.dumps(
+            [
+                [template_hash(t) for t in RESULTS_PAGE_TEMPLATES],
+                sorted(assets.items()),
+            ]
+        ).encode("utf-8")
+    ).hexdigest()[:16]
+
+    def page_path(poll_id):
+        return os.path.join(out_dir, "results", poll_id, "index.html")
+
+    def json_path(poll_id):
+        return os.path.join(out_dir, "api", "polls", poll_id, "results.json")
+
+    exported = {}
+    written = skipped = 0
+    for poll in get_polls():
+        poll_id = poll["id"]
+        if poll.get("is_open") == "true":
+            continue
+        stamp = manifest.get(poll_id)
+        if stamp == f"{poll_data_version(poll_id)}/{site}" and os.path.exists(
+            page_path(poll_id)
+        ):
+            exported[poll_id] = stamp
+            skipped += 1
+            continue
+        snapshot = compute_results_snapshot(poll_id)
+        if snapshot is None:
+            continue
+        with app.test_request_context(f"/results/{poll_id}"):
+            html = render_template(
+                "results.html",
+                poll=poll,
+                vote_count=snapshot["vote_count"],
+                results=snapshot["results"],
+                results_html=results_fragment(poll_id, snapshot),
+            )
+        _write_file_atomic(page_path(poll_id), html.encode("utf-8"))
+        _write_file_atomic(
+            json_path(poll_id),
+            json.dumps(results_json(poll, snapshot)).encode("utf-8"),
+        )
+        exported[poll_id] = f"{snapshot['version']}/{site}"
+        written += 1
+
+    removed = 0
+    for poll_id in manifest.keys() - exported.keys():
+        shutil.rmtree(os.path.dirname(page_path(poll_id)), ignore_errors=True)
+        shutil.rmtree(os.path.dirname(json_path(poll_id)), ignore_errors=True)
+        removed += 1
+    _write_file_atomic(manifest_path, json.dumps(exported, indent=1).encode("utf-8"))
+    return written, skipped, removed
+
+
+@app.cli.command("export-static")
+@click.argument("out_dir")
+def export_static_command(out_dir):
+    """Render closed polls' results into OUT_DIR for a web server to serve."""
+    written, skipped, removed = export_static_site(out_dir)
+    click.echo(
+        f"Exported {written} poll(s), {skipped} unchanged, {removed} removed."
+    )
+
+
 # ============== RUN ==============
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+"""Fingerprinted, precompressed static files.
+
+Flask's default static view serves style.css with a short max-age, so page
+views keep revalidating it. `StaticAssets` reads static/ once, at startup,
+names every file after a hash of its contents (style.css becomes
+style.3f2a9c1b0d4e.css) and gzips the compressible ones once. A
+fingerprinted URL can never point at different bytes, so it is served with
+a year-long `immutable` Cache-Control and repeat visits don't request it
+at all; changing the file changes its URL.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import namedtuple
+
+FINGERPRINT_LENGTH = 12
+# Smaller files aren't worth a gzip variant (the headers cost more).
+GZIP_MIN_BYTES = 256
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# `name` is the path under static/, `url_name` the fingerprinted one;
+# `gzipped` is None when there's no worthwhile gzip variant.
+Asset = namedtuple("Asset", "name url_name data gzipped mimetype etag")
+
+
+def fingerprinted(name, data):
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+    return f"{stem}.{digest}{ext}"
+
+
+def _build(name, path):
+    with open(path, "rb") as f:
+        data = f.read()
+    mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    gzipped = None
+    if len(data) >= GZIP_MIN_BYTES and mimetype.startswith(_COMPRESSIBLE):
+        # mtime=0 keeps the output (and so any ETag derived from it) stable.
+        gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gzipped) >= len(data):
+            gzipped = None
+    url_name = fingerprinted(name, data)
+    etag = url_name.rsplit(".", 2)[-2]
+    return Asset(name, url_name, data, gzipped, mimetype, etag)
+
+
+class StaticAssets:
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._stamp = None  # ((name, mtime_ns, size), ...) last built from
+        self._by_name = {}
+        self._by_url_name = {}
+        self.version = ""  # changes whenever any fingerprint does
+
+    def _scan(self):
+        files = []
+        for root, _, filenames in os.walk(self.folder):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                st = os.stat(path)
+                name = os.path.relpath(path, self.folder).replace(os.sep, "/")
+                files.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(sorted(files))
+
+    def refresh(self):
+        """Rebuild if any file under `folder` was added, removed or changed
+        since the last build. Called once at startup, and per request in
+        debug mode so edits show up without a restart."""
+        stamp = self._scan()
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            by_name = {}
+            for name, _, _ in stamp:
+                by_name[name] = _build(name, os.path.join(self.folder, name))
+            self._by_name = by_name
+            self._by_url_name = {a.url_name: a for a in by_name.values()}
+            self.version = hashlib.sha256(
+                "\n".join(sorted(self._by_url_name)).encode("utf-8")
+            ).hexdigest()[:FINGERPRINT_LENGTH]
+            self._stamp = stamp
+
+    def url_name(self, name):
+        """The fingerprinted name for `name`, or `name` itself if unknown."""
+        asset = self._by_name.get(name)
+        return asset.url_name if asset else name
+
+    def get(self, url_name):
+        return self._by_url_name.get(url_name)
+
+    def __iter__(self):
+        return iter(list(self._by_name.values()))
@@ -0,0 +1,96 @@
+"""Fan-out of published results to live viewers (Server-Sent Events).
+
+Each viewer of a poll's live results holds a `Subscription` with a small
+bounded queue. When the scheduler publishes a new snapshot, the message is
+built once and the same object is dropped into every subscriber's queue, so
+a hundred viewers cost one tally and one serialization, not a hundred.
+
+A viewer that can't keep up (its queue is full) is dropped rather than
+allowed to hold memory or slow the publisher down; its stream ends and the
+browser's EventSource reconnects, starting again from a full snapshot.
+"""
+import json
+import queue
+import threading
+
+
+def sse_event(event, data, event_id=None):
+    """Format one Server-Sent Event with a JSON payload."""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize)
+        # Set when the subscriber was dropped (too slow) or the topic was
+        # closed; the consumer should stop as soon as it sees it.
+        self.dropped = False
+
+    def offer(self, item):
+        """Queue `item` without blocking. Returns False if the queue is
+        full."""
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        """The next queued item, or None after `timeout` seconds (or once
+        dropped)."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drop(self):
+        self.dropped = True
+        self.offer(None)  # wake the consumer if it's waiting
+
+
+class Broadcaster:
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {}  # key -> set of Subscription
+        self.dropped = 0  # slow subscribers dropped so far
+
+    def subscribe(self, key):
+        sub = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, key, sub):
+        with self._lock:
+            subs = self._subscribers.get(key)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[key]
+
+    def subscribers(self, key):
+        with self._lock:
+            return len(self._subscribers.get(key, ()))
+
+    def publish(self, key, item):
+        """Hand `item` to every subscriber of `key`, dropping any whose
+        queue is full."""
+        with self._lock:
+            subs = list(self._subscribers.get(key, ()))
+        for sub in subs:
+            if not sub.offer(item):
+                self.unsubscribe(key, sub)
+                sub.dropped = True
+                self.dropped += 1
+
+    def close(self, key):
+        """End every subscription to `key` (e.g. the poll was deleted)."""
+        with self._lock:
+            subs = self._subscribers.pop(key, set())
+        for sub in subs:
+            sub.drop()
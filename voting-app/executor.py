@@ -0,0 +1,182 @@
+"""Run expensive voting methods in worker processes with a hard time limit.
+
+`kemeny_young` (and `schulze_method` on big polls) is pure-Python CPU work,
+so running it on a request thread holds the GIL and stalls every other
+request in the process. `MethodExecutor` ships those calls to a
+`ProcessPoolExecutor` instead and waits at most `timeout` seconds for an
+answer. A call that overruns raises `MethodTimeout`, and because a running
+task can't be cancelled, its worker processes are killed and the pool is
+replaced so the runaway computation doesn't keep eating a core.
+
+A call can also report progress (see `run`'s `progress`): the worker writes
+it to a counter shared through a multiprocessing Manager, which the waiting
+thread polls every PROGRESS_POLL_SECONDS.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+# How often a waiting `run(..., progress=...)` passes on the worker's progress.
+PROGRESS_POLL_SECONDS = 0.2
+
+
+class MethodTimeout(Exception):
+    """The method didn't finish within the executor's time limit."""
+
+
+def _mp_context():
+    # Forking a multi-threaded Flask process can deadlock the child on a
+    # lock some other thread was holding, so prefer a clean interpreter.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def _call_reporting(fn, counter, args):
+    """Worker side of `run(..., progress=...)`: call `fn(*args)` with a
+    `progress` callback that stores its argument in `counter` (a Manager
+    Value proxy the parent is watching)."""
+
+    def report(value):
+        counter.value = value
+
+    return fn(*args, progress=report)
+
+
+def _wait(future, limit, counter=None, progress=None):
+    """`future.result(timeout=limit)`, passing `counter`'s value on to
+    `progress` whenever it changes while waiting."""
+    if counter is None:
+        return future.result(timeout=limit)
+    deadline = time.monotonic() + limit
+    reported = None
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            result = future.result(timeout=max(0, min(PROGRESS_POLL_SECONDS, remaining)))
+        except TimeoutError:
+            if remaining <= PROGRESS_POLL_SECONDS:
+                raise
+            result = None
+            done = False
+        else:
+            done = True
+        value = counter.value
+        if value and value != reported:
+            reported = value
+            progress(value)
+        if done:
+            return result
+
+
+class MethodExecutor:
+    def __init__(self, max_workers=2, timeout=10.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = None
+        self._manager = None  # started on the first call that wants progress
+        self.timeouts = 0  # how many calls were killed, for monitoring
+
+    def _current_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=_mp_context()
+                )
+            return self._pool
+
+    def _replace(self, pool):
+        """Kill `pool`'s workers and make the next call start a fresh pool."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        # ProcessPoolExecutor has no public way to stop a task that's already
+        # running, so reach into its process table.
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _progress_counter(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = _mp_context().Manager()
+            return self._manager.Value("q", 0)
+
+    def run(self, fn, *args, timeout=None, progress=None):
+        """Call `fn(*args)` in a worker process and return its result.
+
+        Raises MethodTimeout if it takes longer than `timeout` (default:
+        the executor's). `fn` and its arguments must be picklable. With
+        `progress`, `fn` is called as `fn(*args, progress=callback)` and
+        each value it reports is passed to `progress` in this process.
+        """
+        limit = self.timeout if timeout is None else timeout
+        call = (fn, *args)
+        counter = None
+        if progress is not None:
+            counter = self._progress_counter()
+            call = (_call_reporting, fn, counter, args)
+        # One retry: if some *other* call's timeout killed the pool while our
+        # task was queued on it, the task never ran and is worth resubmitting.
+        for attempt in range(2):
+            pool = self._current_pool()
+            try:
+                future = pool.submit(*call)
+            except RuntimeError:
+                # Shut down under us by another call's timeout; try a new one.
+                self._replace(pool)
+                continue
+            try:
+                return _wait(future, limit, counter, progress)
+            except TimeoutError:
+                self.timeouts += 1
+                self._replace(pool)
+                raise MethodTimeout(
+                    f"{getattr(fn, '__name__', fn)} exceeded {limit}s"
+                ) from None
+            except BrokenProcessPool:
+                self._replace(pool)
+                if attempt:
+                    raise
+        raise BrokenProcessPool("results worker pool could not be restarted")
+
+    def map(self, fn, arg_lists, timeout=None):
+        """Run `fn(*args)` for every entry of `arg_lists` across the pool and
+        return the results in order. `timeout` (default: none) bounds the
+        whole batch; overrunning kills the pool like `run` does."""
+        pool = self._current_pool()
+        futures = [pool.submit(fn, *args) for args in arg_lists]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            return [
+                f.result(
+                    timeout=None
+                    if deadline is None
+                    else max(0, deadline - time.monotonic())
+                )
+                for f in futures
+            ]
+        except TimeoutError:
+            self.timeouts += 1
+            self._replace(pool)
+            raise MethodTimeout(
+                f"{getattr(fn, '__name__', fn)} batch exceeded {timeout}s"
+            ) from None
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            manager, self._manager = self._manager, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
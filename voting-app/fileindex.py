@@ -0,0 +1,135 @@
+"""In-memory indexes over CSV files that are only appended to or replaced.
+
+Several pages need a summary of a file that can grow very large: who
+voted on a poll, how many ballots it has, which polls exist. Rebuilding
+that summary from the whole file on every request is what made those
+pages slow. A `FileIndex` reads its file once and afterwards only the rows
+appended since; a different inode, a shrunken file or bytes before the
+last offset that no longer match (a rewrite that reused the inode) make it
+start over. Every write in app.py either appends rows or swaps in a new
+file, so that is all it has to handle.
+
+Subclasses implement `clear` (drop everything), `add_rows` (fold in rows
+as lists, in file order, with `self.fieldnames` set) and whatever queries
+they need, taking `self._lock` around reads. `SortedNames` is for the
+ones that page through a prefix search of usernames.
+"""
+import bisect
+import csv
+import os
+import threading
+from collections import OrderedDict
+
+from tally import fingerprint, iter_lines
+
+
+class FileIndex:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._start_over()
+
+    def _start_over(self):
+        self._stamp = None  # (inode, size, mtime_ns) last indexed
+        self._offset = 0  # bytes of the file already indexed
+        self._crc = 0  # fingerprint of the bytes before _offset
+        self.fieldnames = None
+        self.clear()
+
+    def clear(self):
+        raise NotImplementedError
+
+    def add_rows(self, rows):
+        raise NotImplementedError
+
+    def refresh(self, stat):
+        """Catch up with the file as `stat` (an os.stat result, or None if
+        the file doesn't exist) describes it. Only the first st_size bytes
+        are read, so take the stat where no row can be half-written."""
+        with self._lock:
+            if stat is None:
+                if self._stamp is not None:
+                    self._start_over()
+                return
+            stamp = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if stamp == self._stamp:
+                return
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                self._start_over()
+                return
+            with f:
+                if os.fstat(f.fileno()).st_ino != stat.st_ino:
+                    return  # replaced under us; the next refresh starts over
+                if (
+                    self._stamp is None
+                    or self._stamp[0] != stat.st_ino
+                    or stat.st_size < self._offset
+                    or fingerprint(f, self._offset) != self._crc
+                ):
+                    self._start_over()
+                f.seek(self._offset)
+                reader = csv.reader(iter_lines(f, stat.st_size))
+                if self.fieldnames is None:
+                    self.fieldnames = next(reader, [])
+                self.add_rows(row for row in reader if row)
+                self._offset = stat.st_size
+                self._crc = fingerprint(f, self._offset)
+                self._stamp = stamp
+
+
+class SortedNames:
+    """A sorted list of names, added to a batch of rows at a time and paged
+    through by prefix. Not locked itself; the owning FileIndex's lock
+    covers it."""
+
+    def __init__(self):
+        self._names = []
+
+    def add(self, names):
+        if len(names) == 1:
+            bisect.insort(self._names, names[0])
+        elif names:
+            # Timsort merges the already-sorted run with the new one.
+            self._names.extend(names)
+            self._names.sort()
+
+    def remove(self, name):
+        i = bisect.bisect_left(self._names, name)
+        if i < len(self._names) and self._names[i] == name:
+            del self._names[i]
+
+    def page(self, page, per_page, prefix=""):
+        """Return (the names starting with `prefix` on 1-based `page`, in
+        sorted order, number of names matching)."""
+        start = (page - 1) * per_page
+        lo = bisect.bisect_left(self._names, prefix)
+        # Every string starting with `prefix` sorts below prefix + U+10FFFF.
+        hi = bisect.bisect_left(self._names, prefix + "\U0010ffff", lo)
+        return self._names[lo + start : min(hi, lo + start + per_page)], hi - lo
+
+
+class IndexCache:
+    """The `size` most recently used indexes, by key. `factory(path)`
+    makes a new one."""
+
+    def __init__(self, factory, size):
+        self._factory = factory
+        self.size = size
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, path):
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None or index.path != path:
+                index = self._indexes[key] = self._factory(path)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.size:
+                self._indexes.popitem(last=False)
+            return index
+
+    def discard(self, key):
+        with self._lock:
+            self._indexes.pop(key, None)
@@ -0,0 +1,58 @@
+"""LRU cache of rendered template fragments.
+
+The five method cards on a results page (templates/_results.html) only
+change when the poll's votes do, but rendering them with their Jinja loops
+costs about as much as serving a snapshot. `FragmentCache` keeps the
+rendered HTML per key, along with a stamp (e.g. the data version and a
+hash of the template) that must match for it to be reused. At most one
+rendering is kept per key, so a poll's old versions don't pile up, and the
+least recently used are evicted once the total exceeds `max_bytes`.
+"""
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stamp, html)
+        self._size = 0  # total len() of the cached html
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, stamp, render):
+        """The fragment for `key` rendered at `stamp`, calling `render()`
+        (outside the lock) if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        html = render()
+        with self._lock:
+            self._put(key, stamp, html)
+        return html
+
+    def _put(self, key, stamp, html):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old[1])
+        if len(html) > self.max_bytes:
+            return
+        self._entries[key] = (stamp, html)
+        self._size += len(html)
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def discard(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,73 @@
+"""Password hashing and checking off the request thread.
+
+scrypt/pbkdf2 are slow on purpose (around 100 ms a call), and they used to
+run on whatever request thread needed them; add_user even hashed while
+holding the global CSV lock, so a burst of signups stalled every voter. A
+`PasswordHasher` runs them on a small dedicated thread pool instead
+(hashlib releases the GIL while it works, so threads are enough) and
+admits at most `max_pending` calls at once. Anything beyond that raises
+`HasherBusy` straight away, so overload turns into quick "try again"
+responses rather than an ever-growing queue of sleeping requests.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Too many hashes are already queued or running (or one timed out)."""
+
+
+def hash_parameters(pwhash):
+    """The method and cost part of a werkzeug hash, e.g. "scrypt:32768:8:1"."""
+    return (pwhash or "").split("$", 1)[0]
+
+
+class PasswordHasher:
+    def __init__(self, method="scrypt", max_workers=2, max_pending=32, timeout=10.0):
+        self.method = method
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._parameters = None  # hash_parameters of a hash made with `method`
+        self.rejected = 0  # calls refused because the pool was full, for monitoring
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusy("too many password hashes in flight")
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the hash actually finishes, even if the
+        # caller gives up waiting on it.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy(f"password hash took longer than {self.timeout}s") from None
+
+    def hash(self, password):
+        pwhash = self._run(generate_password_hash, password, self.method)
+        self._parameters = hash_parameters(pwhash)
+        return pwhash
+
+    def verify(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if `pwhash` was made with other parameters than `method`
+        uses now (e.g. before a cost increase)."""
+        if self._parameters is None:
+            self.hash("")
+        return hash_parameters(pwhash) != self._parameters
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,112 @@
+"""Asynchronous results jobs with progress reporting.
+
+For polls where even a bounded computation takes seconds, the JSON API
+doesn't make the client wait: it enqueues a job and hands back its id, and
+the client polls the job for status, progress and finally the result.
+
+Jobs are keyed (by the caller) on something like (poll id, data version).
+Submitting a key that already has a queued, running or finished job
+returns that job instead of starting another one, so a burst of requests
+for the same poll costs a single computation.
+"""
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, key):
+        self.id = secrets.token_urlsafe(9)
+        self.key = key
+        self.status = QUEUED
+        # Free-form counters the job function updates as it goes, e.g.
+        # {"stage": "kemeny_young", "completed": 4, "total": 5}.
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    def __init__(self, max_workers=2, retention=300.0, max_jobs=1000):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="results-job"
+        )
+        self.retention = retention  # seconds a finished job stays queryable
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._by_key = {}
+
+    def submit(self, key, fn):
+        """Return the job for `key`, starting `fn(job)` if there isn't one.
+
+        `fn` runs on a worker thread; whatever it returns becomes
+        `job.result`. It may update `job.progress` while it runs. Failed
+        jobs aren't reused, so a later submit retries.
+        """
+        with self._lock:
+            self._expire()
+            job = self._by_key.get(key)
+            if job is not None and job.status != FAILED:
+                return job
+            job = Job(key)
+            self._by_id[job.id] = job
+            self._by_key[key] = job
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._by_id.get(job_id)
+
+    def _run(self, job, fn):
+        job.status = RUNNING
+        try:
+            result = fn(job)
+        except Exception as e:  # noqa: BLE001 -- reported through the job
+            job.error = str(e) or type(e).__name__
+            status = FAILED
+        else:
+            job.result = result
+            status = DONE
+        # `_expire` (on another thread) sorts finished jobs by finished_at,
+        # so it has to be set before the status says the job is finished.
+        job.finished_at = time.time()
+        job.status = status
+
+    def _expire(self):
+        """Drop finished jobs past their retention, and the oldest finished
+        ones if we're over `max_jobs`. Caller holds the lock."""
+        cutoff = time.time() - self.retention
+        finished = sorted(
+            (j for j in self._by_id.values() if j.finished),
+            key=lambda j: j.finished_at,
+        )
+        excess = len(self._by_id) - self.max_jobs
+        for i, job in enumerate(finished):
+            if job.finished_at >= cutoff and i >= excess:
+                break
+            del self._by_id[job.id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
@@ -0,0 +1,84 @@
+"""In-memory index of polls.csv for the admin dashboard.
+
+The dashboard lists polls newest (or oldest) first, optionally only one
+owner's and/or only open or closed ones, a page at a time. Filtering and
+sorting all of polls.csv for that on every view gets slow with tens of
+thousands of polls, so a `PollIndex` keeps each poll by id plus, for every
+combination of filters, a sorted list of (created_at, id) keys, and pages
+by bisecting to a cursor. admin_create appends to polls.csv, so new polls
+are picked up incrementally; toggling or deleting a poll rewrites the file
+and the index is rebuilt (see fileindex.py).
+"""
+import bisect
+
+from fileindex import FileIndex
+
+STATUSES = ("open", "closed")
+
+
+def poll_status(poll):
+    return "open" if poll.get("is_open") == "true" else "closed"
+
+
+def encode_cursor(key):
+    created_at, poll_id = key
+    return f"{created_at}|{poll_id}"
+
+
+def decode_cursor(cursor):
+    """The (created_at, id) key of a cursor from encode_cursor, or None."""
+    created_at, sep, poll_id = (cursor or "").rpartition("|")
+    return (created_at, poll_id) if sep else None
+
+
+class PollIndex(FileIndex):
+    def clear(self):
+        self._polls = {}  # id -> row dict
+        # (owner or None, status or None) -> sorted [(created_at, id), ...]
+        self._keys = {}
+
+    def add_rows(self, rows):
+        touched = set()
+        for values in rows:
+            poll = dict(zip(self.fieldnames, values))
+            poll_id = poll.get("id")
+            if not poll_id or poll_id in self._polls:
+                continue
+            self._polls[poll_id] = poll
+            key = (poll.get("created_at", ""), poll_id)
+            owner, status = poll.get("owner", ""), poll_status(poll)
+            for combo in ((None, None), (owner, None), (None, status), (owner, status)):
+                self._keys.setdefault(combo, []).append(key)
+                touched.add(combo)
+        for combo in touched:
+            # Appended polls are almost always the newest, so this is
+            # usually a linear check rather than a real sort.
+            self._keys[combo].sort()
+
+    def get(self, poll_id):
+        with self._lock:
+            poll = self._polls.get(poll_id)
+            return dict(poll) if poll else None
+
+    def count(self, owner=None, status=None):
+        with self._lock:
+            return len(self._keys.get((owner, status), ()))
+
+    def page(self, limit, owner=None, status=None, after=None, newest_first=True):
+        """Return (up to `limit` polls matching the filters in created_at
+        order, cursor for the next page or None). `after` is a cursor from
+        an earlier call with the same filters and order."""
+        cursor = decode_cursor(after)
+        with self._lock:
+            keys = self._keys.get((owner, status), [])
+            if newest_first:
+                end = len(keys) if cursor is None else bisect.bisect_left(keys, cursor)
+                start = max(0, end - limit)
+                chosen = keys[start:end][::-1]
+                more = start > 0
+            else:
+                start = 0 if cursor is None else bisect.bisect_right(keys, cursor)
+                chosen = keys[start : start + limit]
+                more = start + limit < len(keys)
+            polls = [dict(self._polls[poll_id]) for _, poll_id in chosen]
+        return polls, encode_cursor(chosen[-1]) if more and chosen else None
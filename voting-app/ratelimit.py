@@ -0,0 +1,74 @@
+"""Per-client token buckets for the endpoints that are expensive to spam.
+
+Every POST to /vote, /admin (login) or /signup does file I/O under the
+global CSV lock, and login and signup also hash a password, so one client
+looping on them can slow everyone else down. A `RateLimiter` gives each
+(route, client) pair a token bucket: `burst` requests straight away, then
+`rate` more per second. A check is a dict lookup and some arithmetic.
+
+Buckets live in one OrderedDict kept in least-recently-used order. A
+bucket that has refilled completely is indistinguishable from a missing
+one, so those are dropped as they reach the front, and if there are still
+more than `max_keys` the least recently used go too (that client just gets
+a fresh burst). Memory stays bounded however many addresses show up.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class RateLimiter:
+    def __init__(self, max_keys=100_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (route, client) -> (tokens, last update, time the bucket is full again)
+        self._buckets = OrderedDict()
+        # For monitoring: requests let through / refused, per route, and
+        # buckets thrown away early because of max_keys.
+        self.allowed = Counter()
+        self.limited = Counter()
+        self.evicted = 0
+
+    def hit(self, route, client, rate, burst):
+        """Take a token from the bucket of (`route`, `client`). Returns 0 if
+        the request may go ahead, else how many seconds until it could."""
+        now = self._clock()
+        key = (route, client)
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                tokens = burst
+            else:
+                tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.allowed[route] += 1
+            else:
+                wait = (1 - tokens) / rate
+                self.limited[route] += 1
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            self._expire(now)
+        return wait
+
+    def _expire(self, now):
+        buckets = self._buckets
+        while buckets:
+            key, (_, _, full_at) = next(iter(buckets.items()))
+            if full_at <= now:
+                del buckets[key]
+            elif len(buckets) > self.max_keys:
+                del buckets[key]
+                self.evicted += 1
+            else:
+                return
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._buckets),
+                "allowed": dict(self.allowed),
+                "limited": dict(self.limited),
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,131 @@
+"""Debounced background recomputation of poll results.
+
+Computing results on the request thread means every page view during a
+voting burst pays for a full tally (and a Kemeny-Young run). Instead, the
+routes that change a poll's votes call `ResultsScheduler.notify(poll_id)`,
+and a single background thread recomputes that poll at most once per
+`debounce` seconds. Readers grab whatever snapshot was published last — it
+may be a few votes behind, but it is instant.
+
+The scheduler knows nothing about CSV files; it is handed a `compute`
+callable that returns a snapshot dict with at least a "version" key (or
+None if the poll no longer exists). `on_publish(poll_id, previous,
+snapshot)`, if given, is called whenever a snapshot with a new version is
+published (e.g. to push it to live viewers).
+
+Snapshots carry a poll's whole tally, so only the `max_polls` most recently
+used are kept; a poll that falls out is simply computed again on its next
+view.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultsScheduler:
+    def __init__(self, compute, debounce=2.0, on_publish=None, max_polls=256):
+        self._compute = compute
+        self.debounce = debounce
+        self._on_publish = on_publish
+        self.max_polls = max_polls
+        # poll_id -> snapshot dict, least recently used first. Snapshots are
+        # never mutated after being published; the lock only guards the
+        # LRU order.
+        self._published = OrderedDict()
+        self._published_lock = threading.Lock()
+        self._due = {}  # poll_id -> time.monotonic() deadline
+        self._last_run = {}  # poll_id -> time.monotonic() of the last compute
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def latest(self, poll_id):
+        """Return the last published snapshot for `poll_id`, or None."""
+        with self._published_lock:
+            snapshot = self._published.get(poll_id)
+            if snapshot is not None:
+                self._published.move_to_end(poll_id)
+            return snapshot
+
+    def publish(self, poll_id, snapshot):
+        with self._published_lock:
+            previous = self._published.get(poll_id)
+            self._published[poll_id] = snapshot
+            self._published.move_to_end(poll_id)
+            while len(self._published) > self.max_polls:
+                self._published.popitem(last=False)
+        if self._on_publish is None:
+            return
+        if previous is not None and previous["version"] == snapshot["version"]:
+            return
+        try:
+            self._on_publish(poll_id, previous, snapshot)
+        except Exception as e:  # noqa: BLE001 -- never fail a publish
+            print(f"⚠️  on_publish for poll {poll_id} failed: {e}")
+
+    def discard(self, poll_id):
+        """Forget everything about a poll (e.g. after it's deleted)."""
+        with self._published_lock:
+            self._published.pop(poll_id, None)
+        with self._cond:
+            self._due.pop(poll_id, None)
+            self._last_run.pop(poll_id, None)
+
+    def pending(self, poll_id):
+        with self._cond:
+            return poll_id in self._due
+
+    def notify(self, poll_id):
+        """Record that `poll_id` changed. The first change after a quiet
+        period is picked up straight away; further changes inside the same
+        window are folded into a single run at the end of it."""
+        with self._cond:
+            if poll_id in self._due:
+                # A run is already queued and will read the newest data.
+                return
+            now = time.monotonic()
+            last = self._last_run.get(poll_id)
+            self._due[poll_id] = now if last is None else max(now, last + self.debounce)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="results-scheduler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _next_due(self):
+        """Block until some poll is due and claim it. Returns None (and lets
+        the worker thread exit) once nothing is queued."""
+        with self._cond:
+            while True:
+                if not self._due:
+                    self._thread = None
+                    return None
+                poll_id, due = min(self._due.items(), key=lambda item: item[1])
+                now = time.monotonic()
+                if due <= now:
+                    del self._due[poll_id]
+                    # A run more than `debounce` ago no longer delays
+                    # anything (see notify), so don't keep it around.
+                    for stale in [
+                        p for p, last in self._last_run.items()
+                        if last + self.debounce <= now
+                    ]:
+                        del self._last_run[stale]
+                    self._last_run[poll_id] = now
+                    return poll_id
+                self._cond.wait(due - now)
+
+    def _run(self):
+        while True:
+            poll_id = self._next_due()
+            if poll_id is None:
+                return
+            try:
+                snapshot = self._compute(poll_id)
+            except Exception as e:  # noqa: BLE001 -- keep the worker alive
+                print(f"⚠️  Background results recompute for poll {poll_id} failed: {e}")
+                continue
+            if snapshot is None:
+                self.discard(poll_id)
+            else:
+                self.publish(poll_id, snapshot)
@@ -0,0 +1,55 @@
+"""Single-flight call coalescing.
+
+When a poll link goes viral, many request threads ask for the same poll's
+results at the same moment. `SingleFlight.do(key, fn)` lets the first
+caller for a key run `fn` while everyone else who arrives before it
+finishes waits and gets the same return value (or the same exception).
+Nothing is cached afterwards — that's the results scheduler's job — so a
+later call with the same key runs `fn` again.
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """Number of keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
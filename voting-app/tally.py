@@ -0,0 +1,259 @@
+"""Tallying votes_<id>.csv files, optionally split across worker processes.
+
+For archived polls with millions of ballots, reading the whole file into a
+list of dicts and parsing it on one core is far too slow. `tally_file`
+instead splits the file into byte ranges aligned on row boundaries, tallies
+each range independently (see algorithms.py for what a tally is) and adds
+the partial tallies together. Addition is associative, so the result is
+identical however the file was split.
+
+Row alignment is done by scanning to the next newline, which is only wrong
+if a quoted field contains a newline. When that happens the chunk before
+the split point ends inside an open quote, which the strict CSV reader
+reports, and `tally_file` falls back to a single serial pass.
+
+Votes files only ever grow by appending (anything else replaces the file),
+so a tally can also be saved next to the file as a sidecar recording how
+many bytes it covers. After a restart, `read_sidecar` + `tally_file(...,
+start=offset)` only has to read the rows appended since.
+"""
+import csv
+import os
+import struct
+import tempfile
+import zlib
+from concurrent.futures.process import BrokenProcessPool
+from functools import reduce
+
+from algorithms import (
+    SCORES_FIELD,
+    add_sparse_ballot,
+    decode_scores,
+    finish_sparse_tally,
+    merge_tallies,
+    new_sparse_tally,
+    new_tally,
+)
+from executor import MethodTimeout
+
+
+class StaleVotesFile(Exception):
+    """The file was replaced (e.g. by delete_vote) while we were reading it."""
+
+
+def _read_header(f):
+    """Return (fieldnames, offset of the first data row) for a binary file
+    positioned at the start."""
+    line = f.readline()
+    fieldnames = next(csv.reader([line.decode("utf-8")]), [])
+    return fieldnames, f.tell()
+
+
+def iter_lines(f, end):
+    """Decoded lines from the current position of binary file `f` up to
+    byte offset `end`."""
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            return
+        yield line.decode("utf-8")
+
+
+def split_ranges(path, start, end, chunks):
+    """Split [start, end) of `path` into at most `chunks` byte ranges, each
+    starting at the beginning of a line."""
+    if chunks <= 1 or end - start <= 0:
+        return [(start, end)]
+    step = (end - start) // chunks
+    bounds = [start]
+    with open(path, "rb") as f:
+        for k in range(1, chunks):
+            target = start + k * step
+            if target <= bounds[-1]:
+                continue
+            # Back up one byte so a split that already sits right after a
+            # newline stays where it is.
+            f.seek(target - 1)
+            f.readline()
+            pos = min(f.tell(), end)
+            if bounds[-1] < pos < end:
+                bounds.append(pos)
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+def row_layout(fieldnames, option_ids):
+    """A picklable description of where each option's score is in a row of
+    a file with these columns (see algorithms.SCORES_FIELD)."""
+    position = {name: i for i, name in enumerate(fieldnames)}
+    if SCORES_FIELD in position:
+        index = {opt_id: i for i, opt_id in enumerate(option_ids)}
+        return ("sparse", position[SCORES_FIELD], index)
+    return ("dense", [position.get(f"option_{opt_id}") for opt_id in option_ids])
+
+
+def _scored(row, layout):
+    """(option index, score) for the non-zero scores in a CSV row."""
+    if layout[0] == "sparse":
+        _, col, index = layout
+        if col >= len(row):
+            return []
+        return [
+            (index[opt_id], score)
+            for opt_id, score in decode_scores(row[col]).items()
+            if score and opt_id in index
+        ]
+    return [
+        (i, score)
+        for i, col in enumerate(layout[1])
+        if col is not None and col < len(row) and (score := int(row[col]))
+    ]
+
+
+def tally_range(path, start, end, layout, n_options, inode=None, strict=False):
+    """Tally the rows in bytes [start, end) of `path`.
+
+    `layout` comes from row_layout and says where each option's score is
+    (options the file has no column for count as 0). If `inode` is given and
+    the file at `path` isn't that inode any more, raise StaleVotesFile.
+    Top-level so it can run in a worker process.
+    """
+    tally = new_sparse_tally(n_options)
+    with open(path, "rb") as f:
+        if inode is not None and os.fstat(f.fileno()).st_ino != inode:
+            raise StaleVotesFile(path)
+        f.seek(start)
+        for row in csv.reader(iter_lines(f, end), strict=strict):
+            if not row:
+                continue
+            add_sparse_ballot(tally, _scored(row, layout))
+    return finish_sparse_tally(tally)
+
+
+def tally_file(
+    path, option_ids, start=None, end=None, chunks=1, map_fn=None, inode=None
+):
+    """Tally `path` from byte offset `start` (default: the first row, and
+    it must be a row boundary) up to `end` (default: its current size).
+
+    With `chunks` > 1 the rows are split into that many ranges and handed to
+    `map_fn(fn, arg_lists)`, which should return `[fn(*args) for args in
+    arg_lists]` (e.g. MethodExecutor.map to use worker processes). If the
+    pool fails or times out (e.g. another call's timeout killed it), the
+    file is tallied serially instead.
+    """
+    n = len(option_ids)
+    if not os.path.exists(path):
+        return new_tally(n)
+    if end is None:
+        end = os.path.getsize(path)
+    with open(path, "rb") as f:
+        fieldnames, data_start = _read_header(f)
+    layout = row_layout(fieldnames, option_ids)
+
+    if start is not None:
+        data_start = max(data_start, start)
+
+    ranges = split_ranges(path, data_start, end, chunks)
+    if map_fn is not None and len(ranges) > 1:
+        try:
+            partials = map_fn(
+                tally_range,
+                [(path, s, e, layout, n, inode, True) for s, e in ranges],
+            )
+            return reduce(merge_tallies, partials, new_tally(n))
+        except csv.Error:
+            pass  # a quoted newline fooled split_ranges; do it the slow way
+        except (BrokenProcessPool, MethodTimeout):
+            pass  # the pool was killed under us; do it here instead
+    return tally_range(path, data_start, end, layout, n, inode)
+
+
+# ============== SIDECARS ==============
+#
+# Layout (little-endian): a fixed header, the option ids the tally's
+# positions belong to, then "totals" and "pairwise" row by row as int64.
+# The header pins down which file and how much of it the tally covers: the
+# inode, the byte offset, and a CRC of the bytes just before that offset,
+# which catches a rewritten file that happens to reuse the inode.
+
+SIDECAR_MAGIC = b"PCMT"
+SIDECAR_VERSION = 1
+# magic, version, inode, offset, crc, count, n
+_SIDECAR_HEADER = struct.Struct("<4sHQQIQI")
+FINGERPRINT_BYTES = 4096
+
+
+def fingerprint(f, offset):
+    """CRC of the (up to) FINGERPRINT_BYTES of binary file `f` before
+    `offset`."""
+    start = max(0, offset - FINGERPRINT_BYTES)
+    f.seek(start)
+    return zlib.crc32(f.read(offset - start))
+
+
+def write_sidecar(sidecar_path, votes_path, tally, option_ids, offset, inode):
+    """Save `tally`, the tally of the first `offset` bytes of `votes_path`.
+    Does nothing if `votes_path` is no longer inode `inode`."""
+    with open(votes_path, "rb") as f:
+        if os.fstat(f.fileno()).st_ino != inode:
+            return
+        crc = fingerprint(f, offset)
+    n = len(option_ids)
+    ids = "\n".join(option_ids).encode("utf-8")
+    values = tally["totals"] + [x for row in tally["pairwise"] for x in row]
+    data = b"".join(
+        [
+            _SIDECAR_HEADER.pack(
+                SIDECAR_MAGIC, SIDECAR_VERSION, inode, offset, crc, tally["count"], n
+            ),
+            struct.pack("<I", len(ids)),
+            ids,
+            struct.pack(f"<{len(values)}q", *values),
+        ]
+    )
+    # Written to a temp file and renamed into place, so a reader never sees
+    # half a sidecar and concurrent writers don't interleave.
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(sidecar_path) or ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, sidecar_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_sidecar(sidecar_path, votes_path, option_ids, inode, size):
+    """Return (tally, offset) from `sidecar_path` if it is a tally of the
+    first `offset` <= `size` bytes of `votes_path` (inode `inode`) for these
+    options, or None if it's missing, unreadable or about something else."""
+    try:
+        with open(sidecar_path, "rb") as f:
+            data = f.read()
+        magic, version, s_inode, offset, crc, count, n = _SIDECAR_HEADER.unpack_from(
+            data
+        )
+        if (magic, version) != (SIDECAR_MAGIC, SIDECAR_VERSION):
+            return None
+        if s_inode != inode or offset > size or n != len(option_ids):
+            return None
+        pos = _SIDECAR_HEADER.size
+        (ids_len,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        if data[pos : pos + ids_len].decode("utf-8").split("\n") != list(option_ids):
+            return None
+        values = struct.unpack_from(f"<{n + n * n}q", data, pos + ids_len)
+        with open(votes_path, "rb") as f:
+            if os.fstat(f.fileno()).st_ino != inode or fingerprint(f, offset) != crc:
+                return None
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+    tally = {
+        "count": count,
+        "totals": list(values[:n]),
+        "pairwise": [list(values[n + i * n : n + (i + 1) * n]) for i in range(n)],
+    }
+    return tally, offset
@@ -89,3 +89,15 @@ def sample_poll(admin_client, app_module):
     # /admin/create redirects to /admin/poll/<poll_id>
     poll_id = resp.headers["Location"].rsplit("/", 1)[-1]
     return poll_id
+
+
+@pytest.fixture
+def vote():
+    """Return a helper that casts ``username``'s ballot on a poll through
+    the public vote route; ``scores`` are in option order."""
+
+    def cast(client, poll_id, username, scores):
+        data = {f"score_{i + 1}": str(s) for i, s in enumerate(scores)}
+        client.post(f"/vote/{poll_id}", data={"username": username, **data})
+
+    return cast
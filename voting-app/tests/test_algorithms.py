@@ -130,3 +130,76 @@ def test_duplicate_option_names_known_limitation():
     # key that gets summed. This is buggy but deterministic; pin it.
     totals = dict(result)
     assert "Same" in totals
+
+
+def test_kemeny_young_reports_progress():
+    options = _options("A", "B", "C", "D")
+    votes = [
+        _vote("u1", option_1=5, option_2=2, option_3=0, option_4=3),
+        _vote("u2", option_1=1, option_2=3, option_3=4, option_4=0),
+    ]
+    parsed = parse_votes(votes, options)
+    seen = []
+    result = kemeny_young(parsed, ["A", "B", "C", "D"], progress=seen.append)
+    assert result == kemeny_young(parsed, ["A", "B", "C", "D"])
+    assert seen and seen == sorted(seen)
+
+
+def test_kemeny_young_survives_float_rounding_in_kernel_cost():
+    # Used to fail the kernel sanity check: 3.0000000000000004 > 3.0.
+    options = _options("A", "B", "C", "D", "E")
+    ballots = [[2, 0, 2, 1, 0], [3, 3, 0, 0, 1], [2, 3, 3, 3, 1]]
+    votes = [
+        _vote(f"u{i}", **{f"option_{j + 1}": s for j, s in enumerate(b)})
+        for i, b in enumerate(ballots)
+    ]
+    parsed = parse_votes(votes, options)
+    result = kemeny_young(parsed, ["A", "B", "C", "D", "E"], brute_force=True)
+    assert sorted(name for name, _ in result) == ["A", "B", "C", "D", "E"]
+
+
+def test_kemeny_young_keeps_an_equally_good_seed():
+    options = _options("A", "B")
+    votes = [
+        _vote("u1", option_1=5, option_2=0),
+        _vote("u2", option_1=0, option_2=5),
+    ]
+    parsed = parse_votes(votes, options)
+    for seed in (["A", "B"], ["B", "A"]):
+        result = kemeny_young(parsed, ["A", "B"], seed=seed)
+        assert [name for name, _ in result] == seed
+
+
+def test_kemeny_young_warm_start_is_optimal_and_prunes():
+    import random
+
+    rng = random.Random(7)
+    names = ["A", "B", "C", "D", "E", "F", "G"]
+    options = _options(*names)
+
+    def ballot(i):
+        scores = {f"option_{j + 1}": rng.randint(0, 5) for j in range(7)}
+        return _vote(f"u{i}", **scores)
+
+    votes = [ballot(i) for i in range(12)]
+    previous = [name for name, _ in kemeny_young(parse_votes(votes, options), names)]
+    votes.append(ballot(12))
+    parsed = parse_votes(votes, options)
+
+    cold, warm = [], []
+    cold_result = kemeny_young(parsed, names, brute_force=True, progress=cold.append)
+    warm_result = kemeny_young(
+        parsed, names, brute_force=True, progress=warm.append, seed=previous
+    )
+    # Position i's cost covers everything from i down, so [0] is the total.
+    assert warm_result[0][1] == pytest.approx(cold_result[0][1])
+    assert warm[-1] <= cold[-1]
+
+
+def test_kemeny_young_ignores_a_seed_for_other_options():
+    options = _options("A", "B", "C")
+    votes = [_vote("u1", option_1=5, option_2=3, option_3=0)]
+    parsed = parse_votes(votes, options)
+    assert kemeny_young(parsed, ["A", "B", "C"], seed=["A", "X"]) == kemeny_young(
+        parsed, ["A", "B", "C"]
+    )
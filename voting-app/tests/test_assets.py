@@ -0,0 +1,55 @@
+"""Fingerprinted, precompressed static assets."""
+import gzip
+
+from assets import StaticAssets
+
+
+def test_fingerprint_follows_the_contents(tmp_path):
+    (tmp_path / "app.css").write_text("body { color: red; }\n" * 50)
+    assets = StaticAssets(str(tmp_path))
+    assets.refresh()
+    first = assets.url_name("app.css")
+    assert first.startswith("app.") and first.endswith(".css") and first != "app.css"
+    assert gzip.decompress(assets.get(first).gzipped) == assets.get(first).data
+
+    (tmp_path / "app.css").write_text("body { color: blue; }\n" * 50)
+    assets.refresh()
+    assert assets.url_name("app.css") != first
+    assert assets.get(first) is None
+    assert assets.url_name("missing.css") == "missing.css"
+
+
+def test_small_files_get_no_gzip_variant(tmp_path):
+    (tmp_path / "tiny.css").write_text("a{}")
+    assets = StaticAssets(str(tmp_path))
+    assets.refresh()
+    assert assets.get(assets.url_name("tiny.css")).gzipped is None
+
+
+def test_pages_link_fingerprinted_css_served_immutable(client, app_module):
+    page = client.get("/admin").get_data(as_text=True)
+    url_name = app_module.static_assets.url_name("style.css")
+    assert f"/static/{url_name}" in page and "/static/style.css" not in page
+
+    resp = client.get(f"/static/{url_name}", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert "max-age=31536000" in resp.headers["Cache-Control"]
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    with open(f"{app_module.app.static_folder}/style.css", "rb") as f:
+        original = f.read()
+    assert gzip.decompress(resp.data) == original
+
+    plain = client.get(f"/static/{url_name}")
+    assert "Content-Encoding" not in plain.headers and plain.data == original
+    again = client.get(
+        f"/static/{url_name}", headers={"If-None-Match": plain.headers["ETag"]}
+    )
+    assert again.status_code == 304
+
+
+def test_unfingerprinted_names_still_served(client):
+    resp = client.get("/static/style.css")
+    assert resp.status_code == 200
+    assert "immutable" not in resp.headers.get("Cache-Control", "")
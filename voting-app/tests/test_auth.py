@@ -45,3 +45,39 @@ def test_logout_clears_session(admin_client):
     admin_client.get("/admin/logout")
     resp = admin_client.get("/admin/dashboard")
     assert resp.status_code == 302
+
+
+def _count_reads(monkeypatch, app_module, name):
+    calls = []
+    real = getattr(app_module, name)
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, name, counting)
+    return calls
+
+
+def test_user_is_loaded_once_per_request(admin_client, app_module, monkeypatch):
+    user_reads = _count_reads(monkeypatch, app_module, "get_user")
+    poll_reads = _count_reads(monkeypatch, app_module, "get_polls")
+    assert admin_client.get("/admin/create").status_code == 200
+    assert len(user_reads) == 1
+    assert len(poll_reads) <= 1
+
+    user_reads.clear()
+    assert admin_client.get("/admin/users").status_code == 200
+    # current_user's lookup; the list itself pages through the user index.
+    assert len(user_reads) == 1
+
+
+def test_user_cache_sees_writes_in_the_same_request(admin_client, app_module):
+    with app_module.app.test_request_context():
+        app_module.session["admin_username"] = app_module.ADMIN_USER
+        assert app_module.is_admin()
+        users = app_module.get_users()
+        for u in users:
+            u["is_admin"] = "false"
+        app_module.save_users(users)
+        assert not app_module.is_admin()
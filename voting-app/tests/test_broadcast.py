@@ -0,0 +1,88 @@
+"""Tests for live results fan-out (broadcast.py) and the SSE endpoint."""
+import threading
+import time
+
+from broadcast import Broadcaster, sse_event
+
+
+def test_one_message_reaches_every_subscriber():
+    hub = Broadcaster(queue_size=4)
+    subs = [hub.subscribe("p") for _ in range(100)]
+    message = sse_event("delta", {"x": 1})
+    hub.publish("p", message)
+    assert all(sub.get(timeout=0) is message for sub in subs)
+    assert hub.subscribers("p") == 100
+
+
+def test_slow_subscriber_is_dropped_without_blocking():
+    hub = Broadcaster(queue_size=2)
+    slow, fast = hub.subscribe("p"), hub.subscribe("p")
+    for i in range(3):
+        hub.publish("p", i)
+        assert fast.get(timeout=0) == i
+    assert slow.dropped and not fast.dropped
+    assert hub.subscribers("p") == 1 and hub.dropped == 1
+
+
+def test_close_wakes_and_ends_subscribers():
+    hub = Broadcaster()
+    sub = hub.subscribe("p")
+    threading.Timer(0.05, hub.close, args=("p",)).start()
+    sub.get(timeout=5)
+    assert sub.dropped and hub.subscribers("p") == 0
+
+
+def test_sse_event_format():
+    assert sse_event("delta", {"a": [1, 2]}, event_id="v1") == (
+        'event: delta\nid: v1\ndata: {"a":[1,2]}\n\n'
+    )
+
+
+def _next_event(chunks, kind):
+    for chunk in chunks:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith(f"event: {kind}"):
+            return text
+    raise AssertionError(f"stream ended before a {kind} event")
+
+
+def test_stream_sends_snapshot_then_deltas(
+    client, sample_poll, app_module, monkeypatch
+):
+    monkeypatch.setattr(app_module, "RESULTS_STREAM_KEEPALIVE_SECONDS", 0.05)
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "ann", "score_1": "5", "score_2": "1", "score_3": "0"},
+    )
+    resp = client.get(f"/api/polls/{sample_poll}/results/stream", buffered=False)
+    assert resp.mimetype == "text/event-stream"
+    chunks = iter(resp.response)
+    assert '"vote_count":1' in _next_event(chunks, "snapshot")
+    assert app_module.results_stream.subscribers(sample_poll) == 1
+
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "bob", "score_1": "0", "score_2": "1", "score_3": "5"},
+    )
+    delta = _next_event(chunks, "delta")
+    assert '"vote_count":2' in delta and '"changed"' in delta
+
+    resp.close()
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        if not app_module.results_stream.subscribers(sample_poll):
+            break
+        time.sleep(0.01)
+    assert app_module.results_stream.subscribers(sample_poll) == 0
+
+
+def test_results_delta_only_lists_changes(app_module):
+    before = {"results": {"a": [("X", 1)], "b": [("Y", 2)], "gone": []}}
+    after = {
+        "version": "v2",
+        "vote_count": 3,
+        "results": {"a": [("X", 1)], "b": [("Y", 3)]},
+    }
+    delta = app_module.results_delta(before, after)
+    assert delta["changed"] == {"b": [("Y", 3)]}
+    assert delta["removed"] == ["gone"]
@@ -0,0 +1,94 @@
+"""Tests for running voting methods in a worker process with a time limit
+(executor.py) and how timed-out methods surface in the results."""
+import time
+
+import pytest
+
+from algorithms import TIMED_OUT, calculate_all_results
+from executor import MethodExecutor, MethodTimeout
+
+
+def _options(*names):
+    return [{"id": i + 1, "name": n, "description": ""} for i, n in enumerate(names)]
+
+
+def _votes():
+    return [
+        {"username": "u1", "option_1": "5", "option_2": "2", "option_3": "0"},
+        {"username": "u2", "option_1": "4", "option_2": "3", "option_3": "1"},
+    ]
+
+
+@pytest.fixture
+def executor():
+    ex = MethodExecutor(max_workers=1, timeout=30)
+    yield ex
+    ex.shutdown()
+
+
+def test_runs_method_in_worker_process(executor):
+    # conftest re-imports `algorithms` per test, and pickle needs the
+    # function object that's currently in sys.modules.
+    from algorithms import kemeny_young
+
+    names = ["A", "B", "C"]
+    parsed = [
+        {"username": "u1", "scores": {"A": 5, "B": 2, "C": 0}},
+        {"username": "u2", "scores": {"A": 4, "B": 3, "C": 1}},
+    ]
+    assert executor.run(kemeny_young, parsed, names) == kemeny_young(parsed, names)
+
+
+def test_progress_is_reported_from_the_worker(executor):
+    from algorithms import kemeny_young
+
+    names = [chr(ord("A") + i) for i in range(9)]
+    parsed = [
+        {"username": f"u{v}", "scores": {n: (i * 7 + v) % 6 for i, n in enumerate(names)}}
+        for v in range(5)
+    ]
+    reported = []
+    result = executor.run(kemeny_young, parsed, names, progress=reported.append)
+    assert result == kemeny_young(parsed, names)
+    assert reported and reported == sorted(reported)
+
+
+def test_runaway_call_is_killed_and_pool_replaced(executor):
+    started = time.monotonic()
+    with pytest.raises(MethodTimeout):
+        executor.run(time.sleep, 30, timeout=0.5)
+    assert time.monotonic() - started < 10
+    assert executor.timeouts == 1
+    # The replacement pool works.
+    assert executor.run(sum, [1, 2, 3]) == 6
+
+
+def test_timed_out_method_is_marked_in_results():
+    def run_method(name, method, parsed, option_names):
+        if name == "kemeny_young":
+            return TIMED_OUT
+        return method(parsed, option_names)
+
+    results = calculate_all_results(
+        _votes(), _options("A", "B", "C"), 5, run_method=run_method
+    )
+    assert results["timed_out"] == ["kemeny_young"]
+    assert results["kemeny_young"] == []
+    assert results["score_voting"][0] == ("A", 9)
+
+
+def test_results_page_renders_timed_out_marker(client, sample_poll, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "OFFLOADED_METHODS", {"kemeny_young": 0})
+
+    def give_up(fn, *args, **kwargs):
+        raise MethodTimeout("kemeny_young exceeded 0s")
+
+    monkeypatch.setattr(app_module.method_executor, "run", give_up)
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "ann", "score_1": "5", "score_2": "1", "score_3": "0"},
+    )
+    resp = client.get(f"/results/{sample_poll}")
+    assert resp.status_code == 200
+    assert b"Timed out" in resp.data
+    assert b"Score Voting" in resp.data
@@ -0,0 +1,64 @@
+"""Tests for streaming ballot/results exports."""
+import csv
+import io
+import json
+
+
+def test_ballot_export_round_trips_through_import(
+    admin_client, sample_poll, app_module, monkeypatch, vote
+):
+    monkeypatch.setattr(app_module, "EXPORT_CHUNK_ROWS", 2)
+    for i in range(5):
+        vote(admin_client, sample_poll, f"v{i}", (i, 5 - i, 0))
+    resp = admin_client.get(
+        f"/admin/poll/{sample_poll}/export/ballots.csv", buffered=False
+    )
+    assert resp.mimetype == "text/csv"
+    assert "attachment" in resp.headers["Content-Disposition"]
+    chunks = list(resp.response)
+    assert len(chunks) > 1  # streamed, not built in one piece
+    exported = b"".join(
+        c if isinstance(c, bytes) else c.encode() for c in chunks
+    )
+    rows = list(csv.DictReader(io.StringIO(exported.decode())))
+    assert [r["username"] for r in rows] == [f"v{i}" for i in range(5)]
+    assert rows[1]["Pizza"] == "1" and rows[1]["Sushi"] == "4"
+
+    # Re-importing the export into a fresh poll reproduces the ballots.
+    admin_client.post(f"/admin/poll/{sample_poll}/delete")
+    options = ["Pizza", "Sushi", "Tacos"]
+    resp = admin_client.post(
+        "/admin/create", data={"title": "Again", "max_score": "5", "options": options}
+    )
+    new_poll = resp.headers["Location"].rsplit("/", 1)[-1]
+    body = admin_client.post(
+        f"/admin/poll/{new_poll}/import",
+        data={"ballots": (io.BytesIO(exported), "b.csv")},
+        content_type="multipart/form-data",
+    ).get_json()
+    assert body["imported"] == 5
+
+
+def test_results_export_ndjson(admin_client, sample_poll, vote):
+    vote(admin_client, sample_poll, "ann", (5, 1, 0))
+    resp = admin_client.get(f"/admin/poll/{sample_poll}/export/results.ndjson")
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    first = [r for r in rows if r["method"] == "score_voting"][0]
+    assert first == {
+        "method": "score_voting",
+        "rank": 1,
+        "option": "Pizza",
+        "value": 5,
+    }
+
+
+def test_export_requires_poll_manager(client, sample_poll):
+    client.get("/admin/logout")
+    url = f"/admin/poll/{sample_poll}/export/ballots.csv"
+    assert client.get(url).status_code == 302
+    client.post(
+        "/signup",
+        data={"username": "eve", "password": "secret", "confirm_password": "secret"},
+    )
+    assert client.get(url).status_code == 404
+    assert client.get(f"/admin/poll/{sample_poll}/export/x.csv").status_code == 404
@@ -0,0 +1,59 @@
+"""Caching of the rendered results cards (templates/_results.html)."""
+from fragments import FragmentCache
+
+
+def test_reuses_a_fragment_until_its_stamp_changes():
+    cache = FragmentCache()
+    renders = []
+
+    def render(text):
+        renders.append(text)
+        return text
+
+    assert cache.get("p", 1, lambda: render("one")) == "one"
+    assert cache.get("p", 1, lambda: render("again")) == "one"
+    assert cache.get("p", 2, lambda: render("two")) == "two"
+    assert renders == ["one", "two"] and len(cache) == 1
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_evicts_least_recently_used_past_the_size_cap():
+    cache = FragmentCache(max_bytes=10)
+    cache.get("a", 1, lambda: "aaaa")
+    cache.get("b", 1, lambda: "bbbb")
+    cache.get("a", 1, lambda: "unused")  # a is now the most recent
+    cache.get("c", 1, lambda: "cccc")
+    assert cache.get("b", 1, lambda: "BBBB") == "BBBB"
+    assert cache.get("a", 1, lambda: "AAAA") == "AAAA"  # evicted by b's return
+    cache.get("big", 1, lambda: "x" * 11)
+    assert "big" not in cache._entries
+
+
+def test_results_page_renders_the_cards_once_per_version(
+    client, sample_poll, app_module, monkeypatch
+):
+    monkeypatch.setattr(app_module, "RESULTS_DEBOUNCE_SECONDS", 0)
+    client.post(f"/vote/{sample_poll}", data={"username": "ann", "option_1": "5"})
+    first = client.get(f"/results/{sample_poll}").get_data(as_text=True)
+    assert "Score Voting" in first and "Pizza" in first
+    misses = app_module.results_fragments.misses
+    second = client.get(f"/results/{sample_poll}").get_data(as_text=True)
+    assert app_module.results_fragments.misses == misses
+    assert app_module.results_fragments.hits >= 1
+    assert second == first
+
+    client.post(f"/vote/{sample_poll}", data={"username": "bob", "option_2": "5"})
+    client.get(f"/results/{sample_poll}")
+    assert app_module.results_fragments.misses == misses + 1
+
+
+def test_template_edits_invalidate_cached_fragments(
+    client, sample_poll, app_module, monkeypatch
+):
+    monkeypatch.setattr(app_module, "RESULTS_DEBOUNCE_SECONDS", 0)
+    client.post(f"/vote/{sample_poll}", data={"username": "ann", "option_1": "5"})
+    client.get(f"/results/{sample_poll}")
+    misses = app_module.results_fragments.misses
+    monkeypatch.setattr(app_module, "template_hash", lambda name: "edited")
+    client.get(f"/results/{sample_poll}")
+    assert app_module.results_fragments.misses == misses + 1
@@ -0,0 +1,46 @@
+"""PasswordHasher: bounded, off-thread password hashing."""
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from hashing import HasherBusy, PasswordHasher
+
+
+def test_hash_and_verify_round_trip():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000")
+    pwhash = hasher.hash("secret")
+    assert pwhash.startswith("pbkdf2:sha256:1000$")
+    assert hasher.verify(pwhash, "secret")
+    assert not hasher.verify(pwhash, "wrong")
+    assert not hasher.verify("", "secret")
+
+
+def test_rejects_straight_away_when_full():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    release = threading.Event()
+    running = threading.Event()
+
+    def slow():
+        running.set()
+        release.wait(5)
+        return "done"
+
+    result = []
+    t = threading.Thread(target=lambda: result.append(hasher._run(slow)))
+    t.start()
+    running.wait(5)
+    with pytest.raises(HasherBusy):
+        hasher.hash("secret")
+    assert hasher.rejected == 1
+    release.set()
+    t.join()
+    assert result == ["done"]
+    # The slot is free again.
+    assert hasher.verify(hasher.hash("secret"), "secret")
+
+
+def test_needs_rehash_compares_parameters():
+    hasher = PasswordHasher(method="pbkdf2:sha256:2000")
+    assert not hasher.needs_rehash(generate_password_hash("x", "pbkdf2:sha256:2000"))
+    assert hasher.needs_rehash(generate_password_hash("x", "pbkdf2:sha256:1000"))
@@ -0,0 +1,136 @@
+"""Tests for bulk ballot import."""
+import io
+import json
+import time
+
+from algorithms import vote_scores
+
+
+def _upload(client, poll_id, content, filename="ballots.csv"):
+    return client.post(
+        f"/admin/poll/{poll_id}/import",
+        data={"ballots": (io.BytesIO(content.encode()), filename)},
+        content_type="multipart/form-data",
+    )
+
+
+def test_csv_import_adds_valid_rows_and_reports_the_rest(
+    admin_client, sample_poll, app_module
+):
+    admin_client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "ann", "score_1": "1", "score_2": "1", "score_3": "1"},
+    )
+    content = (
+        "username,Pizza,Sushi,option_3\n"
+        "bob,5,2,0\n"
+        "cat,,4,1\n"
+        "ann,1,1,1\n"  # already voted
+        "dan,9,0,0\n"  # over max_score
+        "bob,0,0,0\n"  # twice in the upload
+        ",1,1,1\n"
+    )
+    body = _upload(admin_client, sample_poll, content).get_json()
+    assert body["imported"] == 2 and body["rejected"] == 4
+    assert [e["line"] for e in body["errors"]] == [4, 5, 6, 7]
+    assert "already voted" in body["errors"][0]["error"]
+    assert "between 0 and 5" in body["errors"][1]["error"]
+
+    votes = {v["username"]: v for v in app_module.get_votes(sample_poll)}
+    assert set(votes) == {"ann", "bob", "cat"}
+    options = app_module.get_options(sample_poll)
+    ids = [o["id"] for o in options]
+    assert vote_scores(votes["cat"], ids) == [0, 4, 1]
+    snapshot = app_module.compute_results_snapshot(sample_poll)
+    assert snapshot["vote_count"] == 3
+
+
+def test_ndjson_import(admin_client, sample_poll, app_module):
+    lines = [
+        json.dumps(
+            {"username": "x", "Pizza": 3, "submitted_at": "2020-05-01T10:00:00"}
+        ),
+        "not json",
+        json.dumps({"username": "y", "Burgers": 1}),
+    ]
+    resp = _upload(admin_client, sample_poll, "\n".join(lines), "b.ndjson")
+    body = resp.get_json()
+    assert body["imported"] == 1
+    assert [e["error"] for e in body["errors"]] == [
+        "Not valid JSON",
+        "Unknown option 'Burgers'",
+    ]
+    vote = app_module.get_votes(sample_poll)[0]
+    assert vote["submitted_at"] == "2020-05-01T10:00:00"
+
+
+def test_ndjson_scores_must_be_whole_numbers(admin_client, sample_poll, app_module):
+    lines = [
+        json.dumps({"username": "a", "Pizza": 2.7}),
+        json.dumps({"username": "b", "Pizza": True}),
+        json.dumps({"username": "c", "Pizza": "2.0"}),
+        json.dumps({"username": "d", "Pizza": 4, "Sushi": "3"}),
+    ]
+    body = _upload(admin_client, sample_poll, "\n".join(lines), "b.ndjson").get_json()
+    assert body["imported"] == 1 and body["rejected"] == 3
+    assert [e["error"] for e in body["errors"]] == ["Invalid score for 'Pizza'"] * 3
+    (vote,) = app_module.get_votes(sample_poll)
+    ids = [o["id"] for o in app_module.get_options(sample_poll)]
+    assert vote["username"] == "d" and vote_scores(vote, ids) == [4, 3, 0]
+
+
+def test_unreadable_csv_row_rejects_the_whole_upload(
+    admin_client, sample_poll, app_module
+):
+    content = (
+        "username,Pizza\n"
+        "a,1\n"
+        f"b,\"{'x' * 200_000}\"\n"  # over the csv module's field limit
+        "c,2\n"
+        "d,3\n"
+    )
+    resp = _upload(admin_client, sample_poll, content)
+    assert resp.status_code == 400
+    body = resp.get_json()
+    assert body["imported"] == 0
+    assert [e["line"] for e in body["errors"]] == [3]
+    assert body["errors"][0]["error"].startswith("Malformed CSV")
+    assert app_module.get_votes(sample_poll) == []
+
+
+def test_non_utf8_upload_is_rejected(admin_client, sample_poll, app_module):
+    for content, filename in (
+        (b"username,Pizza\na,1\n\xff\xfe,2\n", "ballots.csv"),
+        (b'{"username": "a", "Pizza": 1}\n\xff\xfe\n', "ballots.ndjson"),
+    ):
+        resp = admin_client.post(
+            f"/admin/poll/{sample_poll}/import",
+            data={"ballots": (io.BytesIO(content), filename)},
+            content_type="multipart/form-data",
+        )
+        assert resp.status_code == 400
+        body = resp.get_json()
+        assert body["imported"] == 0
+        assert body["errors"] == [
+            {"line": content.count(b"\n"), "error": "File is not valid UTF-8"}
+        ]
+    assert app_module.get_votes(sample_poll) == []
+
+
+def test_import_requires_poll_manager(client, sample_poll, app_module):
+    client.get("/admin/logout")
+    assert _upload(client, sample_poll, "username\nz\n").status_code == 302
+    client.post(
+        "/signup",
+        data={"username": "eve", "password": "secret", "confirm_password": "secret"},
+    )
+    assert _upload(client, sample_poll, "username\nz\n").status_code == 404
+
+
+def test_import_is_fast(admin_client, sample_poll, app_module):
+    rows = "\n".join(f"user{i},{i % 6},{(i * 7) % 6},0" for i in range(100_000))
+    start = time.monotonic()
+    content = "username,Pizza,Sushi,Tacos\n" + rows
+    body = _upload(admin_client, sample_poll, content).get_json()
+    assert body["imported"] == 100_000
+    assert time.monotonic() - start < 15
@@ -0,0 +1,102 @@
+"""Tests for DynamicSchulze, the incremental Schulze engine. Whatever it
+repairs or recomputes, its ranking must equal a from-scratch Schulze run."""
+import random
+
+import pytest
+
+from algorithms import (
+    DynamicSchulze,
+    add_ballot,
+    new_tally,
+    schulze_method_from_tally,
+    schulze_path_strengths,
+    tally_margins,
+)
+from algorithms import _widest_paths_from
+
+
+def _names(n):
+    return [f"O{i}" for i in range(n)]
+
+
+@pytest.mark.parametrize("n", [2, 3, 5, 9, 16])
+def test_matches_full_schulze_through_adds_and_removes(n):
+    rng = random.Random(n)
+    engine = DynamicSchulze()
+    ballots = []
+    for _ in range(120):
+        if ballots and rng.random() < 0.3:
+            ballots.pop(rng.randrange(len(ballots)))
+        else:
+            ballots.append([rng.randint(0, 5) for _ in range(n)])
+        if not ballots:
+            continue
+        tally = new_tally(n)
+        for ballot in ballots:
+            add_ballot(tally, ballot)
+        assert engine.rank(tally, _names(n)) == schulze_method_from_tally(
+            tally, _names(n)
+        )
+
+
+def test_clear_preferences_are_repaired_not_recomputed():
+    rng = random.Random(7)
+    n = 20
+    quality = [rng.random() * 5 for _ in range(n)]
+
+    def ballot():
+        return [max(0, min(10, round(q * 2 + rng.gauss(0, 2)))) for q in quality]
+
+    tally = new_tally(n)
+    for _ in range(500):
+        add_ballot(tally, ballot())
+    engine = DynamicSchulze()
+    engine.rank(tally, _names(n))
+    for _ in range(30):
+        add_ballot(tally, ballot())
+        assert engine.rank(tally, _names(n)) == schulze_method_from_tally(
+            tally, _names(n)
+        )
+    assert engine.full_recomputes < 5
+    assert engine.rows_repaired < 30 * n
+
+
+def test_widest_path_row_matches_floyd_warshall():
+    rng = random.Random(3)
+    n = 12
+    tally = new_tally(n)
+    for _ in range(40):
+        add_ballot(tally, [rng.randint(0, 10) for _ in range(n)])
+    margins = tally_margins(tally)
+    full = schulze_path_strengths(margins)
+    for source in range(n):
+        row = _widest_paths_from(source, margins)
+        assert [v for j, v in enumerate(row) if j != source] == [
+            v for j, v in enumerate(full[source]) if j != source
+        ]
+
+
+def test_changed_options_trigger_full_recompute():
+    engine = DynamicSchulze()
+    tally = new_tally(2)
+    add_ballot(tally, [3, 1])
+    engine.rank(tally, ["A", "B"])
+    bigger = new_tally(3)
+    add_ballot(bigger, [3, 1, 2])
+    assert engine.rank(bigger, ["A", "B", "C"]) == schulze_method_from_tally(
+        bigger, ["A", "B", "C"]
+    )
+    assert engine.full_recomputes == 2
+
+
+def test_app_keeps_one_engine_per_poll(client, sample_poll, app_module):
+    for i, scores in enumerate([("5", "1", "0"), ("4", "2", "1"), ("0", "5", "3")]):
+        client.post(
+            f"/vote/{sample_poll}",
+            data={"username": f"v{i}", **{f"score_{k + 1}": s for k, s in enumerate(scores)}},
+        )
+        app_module.compute_results_snapshot(sample_poll)
+    engine, _ = app_module._schulze_engines[sample_poll]
+    assert engine.full_recomputes >= 1
+    client.post(f"/admin/poll/{sample_poll}/delete")
+    assert sample_poll not in app_module._schulze_engines
@@ -0,0 +1,114 @@
+"""Tests for the asynchronous results job queue (jobs.py) and its JSON API."""
+import threading
+import time
+
+from jobs import DONE, FAILED, JobQueue
+
+
+def _wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_same_key_coalesces_onto_one_job():
+    release = threading.Event()
+    calls = []
+
+    def work(job):
+        calls.append(job.id)
+        release.wait(5)
+        return "result"
+
+    queue = JobQueue(max_workers=4)
+    jobs = [queue.submit(("poll", "v1"), work) for _ in range(20)]
+    release.set()
+    assert len({j.id for j in jobs}) == 1
+    assert _wait_for(jobs[0]).status == DONE
+    assert jobs[0].result == "result"
+    assert len(calls) == 1
+    # A new data version is a new job.
+    assert queue.submit(("poll", "v2"), work).id != jobs[0].id
+
+
+def test_failed_job_reports_error_and_is_retried():
+    def boom(job):
+        raise ValueError("bad data")
+
+    queue = JobQueue(max_workers=1)
+    job = _wait_for(queue.submit("k", boom))
+    assert job.status == FAILED
+    assert job.to_dict()["error"] == "bad data"
+    retry = _wait_for(queue.submit("k", lambda job: 42))
+    assert retry.id != job.id and retry.result == 42
+
+
+def test_finished_jobs_expire():
+    queue = JobQueue(max_workers=1, retention=0)
+    job = _wait_for(queue.submit("k", lambda job: 1))
+    queue.submit("other", lambda job: 2)
+    assert queue.get(job.id) is None
+
+
+def test_finished_job_always_has_finished_at():
+    queue = JobQueue(max_workers=4, retention=0)
+    jobs = [queue.submit(i, lambda job: 1) for i in range(200)]
+    # Submitting expires on the caller's thread while the workers finish
+    # jobs; a job that reads as finished must already have its timestamp.
+    for job in jobs:
+        _wait_for(job)
+        assert job.finished_at is not None
+        queue.submit(("again", job.key), lambda job: 1)
+
+
+def test_results_job_api_reports_progress_and_result(client, sample_poll):
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "ann", "score_1": "5", "score_2": "1", "score_3": "0"},
+    )
+    resp = client.get(f"/api/polls/{sample_poll}/results/job")
+    assert resp.status_code == 202
+    job_id = resp.get_json()["job_id"]
+    # Asking again for the same data joins the same job.
+    assert client.get(f"/api/polls/{sample_poll}/results/job").get_json()[
+        "job_id"
+    ] == job_id
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        body = client.get(f"/api/jobs/{job_id}").get_json()
+        if body["status"] == DONE:
+            break
+        time.sleep(0.01)
+    assert body["status"] == DONE
+    assert body["progress"]["completed"] == body["progress"]["total"] == 5
+    assert body["result"]["vote_count"] == 1
+    assert body["result"]["results"]["score_voting"][0] == ["Pizza", 5]
+
+
+def test_results_job_api_unknown_ids(client):
+    assert client.get("/api/polls/nope/results/job").status_code == 404
+    assert client.get("/api/jobs/nope").status_code == 404
+
+
+def test_offloaded_kemeny_reports_states_explored(app_module):
+    from algorithms import kemeny_young_from_tally, tally_votes
+
+    options = [{"id": str(i), "name": f"O{i}"} for i in range(1, 9)]
+    votes = [
+        {"username": f"u{v}", **{f"option_{i}": str((i * 5 + v) % 6) for i in range(1, 9)}}
+        for v in range(6)
+    ]
+    names = [o["name"] for o in options]
+    assert len(names) >= app_module.OFFLOADED_METHODS["kemeny_young"]
+    reported = []
+    ranking = app_module.run_results_method(
+        "kemeny_young",
+        kemeny_young_from_tally,
+        tally_votes(votes, options),
+        names,
+        progress=reported.append,
+    )
+    assert ranking == kemeny_young_from_tally(tally_votes(votes, options), names)
+    assert reported and reported[-1] > 0
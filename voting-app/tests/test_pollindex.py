@@ -0,0 +1,116 @@
+"""PollIndex: filtered, cursor-paginated listing of polls.csv."""
+import csv
+import os
+import time
+
+from pollindex import PollIndex
+
+FIELDS = ["id", "title", "description", "created_at", "is_open", "max_score", "owner"]
+
+
+def _poll(i, owner="alice", is_open="true"):
+    return {
+        "id": f"p{i:03d}",
+        "title": f"Poll {i}",
+        "description": "",
+        "created_at": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        "is_open": is_open,
+        "max_score": "5",
+        "owner": owner,
+    }
+
+
+def _write(path, polls, mode="w"):
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if mode == "w":
+            writer.writeheader()
+        writer.writerows(polls)
+
+
+def _index(path):
+    index = PollIndex(str(path))
+    index.refresh(os.stat(path))
+    return index
+
+
+def _ids(polls):
+    return [p["id"] for p in polls]
+
+
+def test_pages_newest_first_by_cursor(tmp_path):
+    path = tmp_path / "polls.csv"
+    _write(path, [_poll(i) for i in range(5)])
+    index = _index(path)
+    first, cursor = index.page(2)
+    assert _ids(first) == ["p004", "p003"]
+    second, cursor = index.page(2, after=cursor)
+    assert _ids(second) == ["p002", "p001"]
+    last, cursor = index.page(2, after=cursor)
+    assert _ids(last) == ["p000"] and cursor is None
+
+
+def test_pages_oldest_first(tmp_path):
+    path = tmp_path / "polls.csv"
+    _write(path, [_poll(i) for i in range(3)])
+    index = _index(path)
+    first, cursor = index.page(2, newest_first=False)
+    assert _ids(first) == ["p000", "p001"]
+    assert _ids(index.page(2, after=cursor, newest_first=False)[0]) == ["p002"]
+
+
+def test_filters_by_owner_and_status(tmp_path):
+    path = tmp_path / "polls.csv"
+    _write(
+        path,
+        [
+            _poll(0, owner="alice"),
+            _poll(1, owner="bob"),
+            _poll(2, owner="alice", is_open="false"),
+            _poll(3, owner="bob", is_open="false"),
+        ],
+    )
+    index = _index(path)
+    assert _ids(index.page(10, owner="alice")[0]) == ["p002", "p000"]
+    assert _ids(index.page(10, status="closed")[0]) == ["p003", "p002"]
+    assert _ids(index.page(10, owner="bob", status="open")[0]) == ["p001"]
+    assert index.count(owner="alice") == 2 and index.count() == 4
+    assert index.count(owner="carol") == 0
+
+
+def test_appended_polls_are_added_and_rewrites_rebuild(tmp_path):
+    path = tmp_path / "polls.csv"
+    _write(path, [_poll(0), _poll(1)])
+    index = _index(path)
+    _write(path, [_poll(2, owner="bob")], mode="a")
+    index.refresh(os.stat(path))
+    assert index.count(owner="bob") == 1
+    assert _ids(index.page(1)[0]) == ["p002"]
+
+    tmp = tmp_path / "polls.tmp"
+    _write(tmp, [_poll(0, is_open="false")])
+    os.replace(tmp, path)
+    index.refresh(os.stat(path))
+    assert index.count() == 1 and index.get("p001") is None
+    assert index.get("p000")["is_open"] == "false"
+
+
+def test_same_inode_rewrite_is_noticed(tmp_path):
+    path = tmp_path / "polls.csv"
+    _write(path, [_poll(0), _poll(1)])
+    index = _index(path)
+    time.sleep(0.01)
+    # Rewritten in place: same inode, different (longer) contents.
+    _write(path, [_poll(5, owner="carol"), _poll(6), _poll(7)])
+    index.refresh(os.stat(path))
+    assert index.get("p000") is None
+    assert index.count(owner="carol") == 1 and index.count() == 3
+
+
+def test_returned_polls_are_copies(tmp_path):
+    path = tmp_path / "polls.csv"
+    _write(path, [_poll(0)])
+    index = _index(path)
+    index.page(1)[0][0]["title"] = "changed"
+    index.get("p000")["title"] = "changed"
+    assert index.get("p000")["title"] == "Poll 0"
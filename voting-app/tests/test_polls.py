@@ -126,6 +126,18 @@ def test_toggle_poll_flips_is_open(admin_client, sample_poll, app_module):
     assert poll["is_open"] == "false"
 
 
+def test_get_poll_uses_the_poll_index(sample_poll, app_module, monkeypatch):
+    app_module.get_poll(sample_poll)
+
+    def no_full_read(*args, **kwargs):
+        raise AssertionError("get_poll must not read all of polls.csv")
+
+    monkeypatch.setattr(app_module, "get_polls", no_full_read)
+    monkeypatch.setattr(app_module, "read_csv", no_full_read)
+    assert app_module.get_poll(sample_poll)["id"] == sample_poll
+    assert app_module.get_poll("does-not-exist") is None
+
+
 def test_delete_poll_removes_csv_files(admin_client, sample_poll, app_module):
     import os
 
@@ -134,3 +146,54 @@ def test_delete_poll_removes_csv_files(admin_client, sample_poll, app_module):
     admin_client.post(f"/admin/poll/{sample_poll}/delete")
     assert not os.path.exists(options_path)
     assert app_module.get_poll(sample_poll) is None
+
+
+def test_admin_poll_lists_voters_a_page_at_a_time(
+    admin_client, sample_poll, app_module, monkeypatch
+):
+    monkeypatch.setattr(app_module, "VOTES_PAGE_SIZE", 2)
+    for name in ("ann", "bob", "cat"):
+        admin_client.post(f"/vote/{sample_poll}", data={"username": name})
+    first = admin_client.get(f"/admin/poll/{sample_poll}").get_data(as_text=True)
+    assert "Votes (3)" in first and "Page 1 of 2" in first
+    assert "ann" in first and "bob" in first and "cat" not in first
+    second = admin_client.get(f"/admin/poll/{sample_poll}?page=2").get_data(
+        as_text=True
+    )
+    assert "cat" in second and "bob" not in second
+
+
+def test_iter_votes_only_sees_rows_present_when_it_started(
+    client, sample_poll, app_module
+):
+    client.post(f"/vote/{sample_poll}", data={"username": "ann"})
+    rows = app_module.iter_votes(sample_poll)
+    assert next(rows)["username"] == "ann"
+    client.post(f"/vote/{sample_poll}", data={"username": "bob"})
+    assert list(rows) == []
+    assert [v["username"] for v in app_module.iter_votes(sample_poll)] == [
+        "ann",
+        "bob",
+    ]
+
+
+def test_admin_poll_searches_voters_by_username_prefix(
+    admin_client, sample_poll, app_module, monkeypatch
+):
+    monkeypatch.setattr(app_module, "VOTES_PAGE_SIZE", 1)
+    for name in ("bob", "anna", "ann", "cat"):
+        admin_client.post(f"/vote/{sample_poll}", data={"username": name})
+    first = admin_client.get(f"/admin/poll/{sample_poll}?q=an").get_data(
+        as_text=True
+    )
+    assert "Votes (2)" in first and "Page 1 of 2" in first
+    assert "<strong>ann</strong>" in first and "anna" not in first
+    assert "q=an" in first  # the Next link keeps the search
+    second = admin_client.get(f"/admin/poll/{sample_poll}?q=an&page=2").get_data(
+        as_text=True
+    )
+    assert "<strong>anna</strong>" in second
+    none = admin_client.get(f"/admin/poll/{sample_poll}?q=zed").get_data(
+        as_text=True
+    )
+    assert "Votes (0)" in none and "No voters match" in none
@@ -0,0 +1,65 @@
+"""Token-bucket rate limiting of vote, login and signup POSTs."""
+from ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_a_burst_then_refills():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    assert [limiter.hit("vote", "1.2.3.4", 1.0, 3) for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit("vote", "1.2.3.4", 1.0, 3) == 1.0
+    # Other clients and other routes have their own buckets.
+    assert limiter.hit("vote", "5.6.7.8", 1.0, 3) == 0
+    assert limiter.hit("signup", "1.2.3.4", 1.0, 3) == 0
+    clock.now += 1.5
+    assert limiter.hit("vote", "1.2.3.4", 1.0, 3) == 0
+    assert limiter.stats()["limited"] == {"vote": 1}
+
+
+def test_full_buckets_expire_and_the_table_is_bounded():
+    clock = FakeClock()
+    limiter = RateLimiter(max_keys=2, clock=clock)
+    limiter.hit("vote", "a", 1.0, 2)
+    clock.now += 10  # a's bucket is full again: forgotten on the next hit
+    limiter.hit("vote", "b", 1.0, 2)
+    assert limiter.stats()["clients"] == 1
+    limiter.hit("vote", "c", 1.0, 2)
+    limiter.hit("vote", "d", 1.0, 2)
+    stats = limiter.stats()
+    assert stats["clients"] == 2 and stats["evicted"] == 1
+
+
+def test_vote_posts_are_limited_before_touching_csv(
+    client, sample_poll, app_module, monkeypatch
+):
+    app_module.app.config["RATELIMIT_ENABLED"] = True
+    monkeypatch.setitem(app_module.RATE_LIMITS, "vote", (0.001, 2))
+    for name in ("ann", "bob"):
+        assert client.post(f"/vote/{sample_poll}", data={"username": name}).status_code != 429
+
+    def no_csv(*args, **kwargs):
+        raise AssertionError("rate-limited request read a CSV")
+
+    monkeypatch.setattr(app_module, "get_poll", no_csv)
+    resp = client.post(f"/vote/{sample_poll}", data={"username": "cat"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+
+
+def test_admins_can_read_the_counters(admin_client, app_module):
+    app_module.app.config["RATELIMIT_ENABLED"] = True
+    admin_client.post("/signup", data={"username": "x"})
+    stats = admin_client.get("/api/admin/rate-limits").get_json()
+    assert stats["allowed"]["signup"] == 1
+    assert stats["limits"]["vote"] == list(app_module.RATE_LIMITS["vote"])
+
+
+def test_counters_are_admin_only(client, app_module):
+    assert client.get("/api/admin/rate-limits").status_code == 403
@@ -0,0 +1,91 @@
+"""Tests for the JSON results API and conditional GETs on results."""
+import time
+
+
+def test_results_api_returns_every_method(client, sample_poll, vote):
+    vote(client, sample_poll, "ann", (5, 1, 0))
+    resp = client.get(f"/api/polls/{sample_poll}/results")
+    assert resp.status_code == 200
+    assert resp.headers["ETag"]
+    body = resp.get_json()
+    assert body["vote_count"] == 1 and body["is_open"] is True
+    assert set(body["results"]) >= {
+        "score_voting",
+        "schulze_method",
+        "borda_count",
+        "star_voting",
+        "kemeny_young",
+    }
+    assert "tally" not in body
+    assert client.get("/api/polls/nope/results").status_code == 404
+
+
+def test_matching_etag_is_answered_without_computing(
+    client, sample_poll, app_module, monkeypatch, vote
+):
+    vote(client, sample_poll, "ann", (5, 1, 0))
+    for url in (f"/api/polls/{sample_poll}/results", f"/results/{sample_poll}"):
+        etag = client.get(url).headers["ETag"]
+
+        def no_compute(*args, **kwargs):
+            raise AssertionError("a 304 must not compute results")
+
+        with monkeypatch.context() as m:
+            m.setattr(app_module, "compute_results_coalesced", no_compute)
+            m.setattr(app_module, "get_results_snapshot", no_compute)
+            resp = client.get(url, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.headers["ETag"] == etag
+        assert resp.data == b""
+
+
+def test_etag_changes_with_new_votes_and_poll_state(
+    admin_client, sample_poll, app_module, vote
+):
+    url = f"/api/polls/{sample_poll}/results"
+    vote(admin_client, sample_poll, "ann", (5, 1, 0))
+    first = admin_client.get(url).headers["ETag"]
+    assert first != admin_client.get(f"/results/{sample_poll}").headers["ETag"]
+
+    vote(admin_client, sample_poll, "bob", (0, 1, 5))
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        resp = admin_client.get(url, headers={"If-None-Match": first})
+        if resp.status_code == 200:
+            break
+        time.sleep(0.05)
+    assert resp.status_code == 200 and resp.get_json()["vote_count"] == 2
+    second = resp.headers["ETag"]
+
+    admin_client.post(f"/admin/poll/{sample_poll}/toggle")
+    resp = admin_client.get(url, headers={"If-None-Match": second})
+    assert resp.status_code == 200 and resp.get_json()["is_open"] is False
+
+
+def test_html_etag_changes_with_templates_and_asset_fingerprints(
+    client, sample_poll, app_module, monkeypatch, vote
+):
+    vote(client, sample_poll, "ann", (5, 1, 0))
+    url = f"/results/{sample_poll}"
+    etag = client.get(url).headers["ETag"]
+    json_etag = client.get(f"/api/polls/{sample_poll}/results").headers["ETag"]
+
+    monkeypatch.setattr(app_module.static_assets, "version", "new-stylesheet")
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+    etag = resp.headers["ETag"]
+
+    real_hash = app_module.template_hash
+    monkeypatch.setattr(
+        app_module,
+        "template_hash",
+        lambda name: "edited" if name == "base.html" else real_hash(name),
+    )
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+
+    # The JSON doesn't depend on either.
+    resp = client.get(
+        f"/api/polls/{sample_poll}/results", headers={"If-None-Match": json_etag}
+    )
+    assert resp.status_code == 304
@@ -0,0 +1,156 @@
+"""Tests for the debounced background results scheduler (scheduler.py) and
+how the results routes consume its snapshots."""
+import threading
+import time
+
+from scheduler import ResultsScheduler
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_burst_of_changes_is_recomputed_at_most_once_per_window():
+    calls = []
+    lock = threading.Lock()
+
+    def compute(poll_id):
+        with lock:
+            calls.append(poll_id)
+        return {"version": len(calls), "vote_count": 0, "results": {}}
+
+    scheduler = ResultsScheduler(compute, debounce=0.3)
+    for _ in range(50):
+        scheduler.notify("p1")
+    # Leading edge: the first change is computed straight away...
+    assert _wait_until(lambda: scheduler.latest("p1") is not None)
+    for _ in range(50):
+        scheduler.notify("p1")
+    # ...and everything that arrives during the window folds into one more run.
+    assert _wait_until(lambda: not scheduler.pending("p1"))
+    assert _wait_until(lambda: scheduler.latest("p1")["version"] == 2)
+    assert calls == ["p1", "p1"]
+
+
+def test_failed_compute_keeps_worker_alive():
+    outcomes = iter([RuntimeError("boom"), {"version": "v", "results": {}}])
+
+    def compute(poll_id):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    scheduler = ResultsScheduler(compute, debounce=0)
+    scheduler.notify("p1")
+    assert _wait_until(lambda: not scheduler.pending("p1"))
+    scheduler.notify("p1")
+    assert _wait_until(lambda: scheduler.latest("p1") is not None)
+
+
+def test_only_recently_used_snapshots_are_kept():
+    scheduler = ResultsScheduler(lambda poll_id: None, max_polls=2)
+    for poll_id in ("p1", "p2"):
+        scheduler.publish(poll_id, {"version": poll_id, "results": {}})
+    assert scheduler.latest("p1") is not None  # now the most recently used
+    scheduler.publish("p3", {"version": "p3", "results": {}})
+    assert scheduler.latest("p2") is None
+    assert scheduler.latest("p1")["version"] == "p1"
+    assert scheduler.latest("p3")["version"] == "p3"
+
+
+def test_old_run_times_are_forgotten():
+    scheduler = ResultsScheduler(
+        lambda poll_id: {"version": 1, "results": {}}, debounce=0.05
+    )
+    for poll_id in ("p1", "p2"):
+        scheduler.notify(poll_id)
+        assert _wait_until(lambda: scheduler.latest(poll_id) is not None)
+    time.sleep(0.1)
+    scheduler.notify("p3")
+    assert _wait_until(lambda: scheduler.latest("p3") is not None)
+    assert set(scheduler._last_run) == {"p3"}
+
+
+def test_results_page_serves_published_snapshot(client, sample_poll, app_module):
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "ann", "score_1": "5", "score_2": "1", "score_3": "0"},
+    )
+    assert client.get(f"/results/{sample_poll}").status_code == 200
+    snapshot = app_module.results_scheduler.latest(sample_poll)
+    assert snapshot["vote_count"] == 1
+    assert snapshot["version"] == app_module.poll_data_version(sample_poll)
+
+
+def test_vote_changes_data_version_and_triggers_recompute(
+    client, sample_poll, app_module
+):
+    before = app_module.poll_data_version(sample_poll)
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "ann", "score_1": "5", "score_2": "1", "score_3": "0"},
+    )
+    assert app_module.poll_data_version(sample_poll) != before
+    assert _wait_until(
+        lambda: (app_module.results_scheduler.latest(sample_poll) or {}).get(
+            "vote_count"
+        )
+        == 1
+    )
+
+
+def test_recompute_warm_starts_kemeny_from_published_ranking(
+    client, sample_poll, app_module
+):
+    # Two opposite ballots tie every pair, so every ranking is optimal and
+    # the warm start decides which one is shown.
+    for username, scores in (("ann", "510"), ("bob", "015")):
+        data = {f"score_{i + 1}": s for i, s in enumerate(scores)}
+        client.post(f"/vote/{sample_poll}", data={"username": username, **data})
+    names = [o["name"] for o in app_module.get_options(sample_poll)]
+    for order in (names, names[::-1]):
+        app_module.results_scheduler.publish(
+            sample_poll,
+            {
+                "version": None,
+                "vote_count": 2,
+                "results": {"kemeny_young": [(n, "0") for n in order]},
+            },
+        )
+        snapshot = app_module.compute_results_snapshot(sample_poll)
+        assert [n for n, _ in snapshot["results"]["kemeny_young"]] == order
+
+
+def test_kemeny_warm_start_survives_losing_the_snapshot(
+    client, sample_poll, app_module, vote, monkeypatch
+):
+    # Keep the background recompute from publishing rankings of its own.
+    monkeypatch.setattr(app_module.results_scheduler, "notify", lambda poll_id: None)
+    for username, scores in (("ann", (5, 1, 0)), ("bob", (0, 1, 5))):
+        vote(client, sample_poll, username, scores)
+    # Every pair is tied, so the cold result is one of many optimal
+    # rankings; warm-starting from its reverse keeps the reverse.
+    cold = app_module.compute_results_snapshot(sample_poll)
+    order = [n for n, _ in cold["results"]["kemeny_young"]][::-1]
+    app_module.results_scheduler.publish(
+        sample_poll,
+        {
+            "version": None,
+            "vote_count": 2,
+            "results": {"kemeny_young": [(n, "0") for n in order]},
+        },
+    )
+    app_module.compute_results_snapshot(sample_poll)
+    # As after a restart, or once the poll's snapshot was evicted.
+    app_module.results_scheduler.discard(sample_poll)
+    snapshot = app_module.compute_results_snapshot(sample_poll)
+    assert [n for n, _ in snapshot["results"]["kemeny_young"]] == order
+
+    app_module.forget_poll_results(sample_poll)
+    assert app_module._previous_kemeny_ranking(sample_poll) is None
@@ -1,4 +1,6 @@
 """Tests for the public signup flow + per-user poll limit (#17)."""
+import re
+
 import pytest
 
 
@@ -287,3 +289,37 @@ def test_dashboard_displays_poll_count_for_non_admin(client, app_module, monkeyp
     resp = client.get("/admin/dashboard")
     assert resp.status_code == 200
     assert b"1 / 5" in resp.data or b"1/5" in resp.data
+
+
+def test_dashboard_pages_filters_and_counts_votes(admin_client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "DASHBOARD_PAGE_SIZE", 2)
+    ids = []
+    for title in ("Alpha", "Beta", "Gamma"):
+        resp = admin_client.post(
+            "/admin/create",
+            data={"title": title, "max_score": "5", "options": ["X", "Y"]},
+        )
+        ids.append(resp.headers["Location"].rsplit("/", 1)[-1])
+    for name in ("ann", "bob"):
+        admin_client.post(f"/vote/{ids[2]}", data={"username": name})
+    admin_client.post(f"/admin/poll/{ids[0]}/toggle")
+
+    first = admin_client.get("/admin/dashboard").get_data(as_text=True)
+    assert "Gamma" in first and "Beta" in first and "Alpha" not in first
+    assert "2 votes" in first and "3 polls" in first
+    next_url = re.search(r'href="(/admin/dashboard\?[^"]*after=[^"]*)"', first)[1]
+    second = admin_client.get(next_url.replace("&amp;", "&")).get_data(as_text=True)
+    assert "Alpha" in second and "Gamma" not in second
+
+    closed = admin_client.get("/admin/dashboard?status=closed").get_data(as_text=True)
+    assert "Alpha" in closed and "Beta" not in closed and "1 poll<" in closed
+
+    oldest = admin_client.get("/admin/dashboard?sort=oldest").get_data(as_text=True)
+    assert oldest.index("Alpha") < oldest.index("Beta")
+
+
+def test_non_admin_cannot_filter_to_other_owners(client, app_module):
+    _signup_and_login(client, "alice")
+    _create_poll_as(client, title="Alice poll")
+    dash = client.get(f"/admin/dashboard?owner={app_module.ADMIN_USER}")
+    assert b"Alice poll" in dash.data
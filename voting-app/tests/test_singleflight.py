@@ -0,0 +1,75 @@
+"""Tests for single-flight coalescing of concurrent results computations."""
+import threading
+import time
+
+from singleflight import SingleFlight
+
+
+def _hammer(n, target):
+    barrier = threading.Barrier(n)
+    out = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            out[i] = target()
+        except Exception as exc:  # noqa: BLE001
+            out[i] = exc
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    results = _hammer(10, lambda: flights.do("k", slow))
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.in_flight() == 0
+
+
+def test_error_is_shared_and_not_remembered():
+    flights = SingleFlight()
+
+    def boom():
+        time.sleep(0.1)
+        raise ValueError("nope")
+
+    results = _hammer(5, lambda: flights.do("k", boom))
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flights.do("k", lambda: 7) == 7
+
+
+def test_results_fan_in_computes_once(app_module, sample_poll, client, monkeypatch):
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "ann", "score_1": "5", "score_2": "1", "score_3": "0"},
+    )
+    # Drop anything the scheduler already published so every thread misses.
+    app_module.results_scheduler.discard(sample_poll)
+    calls = []
+    real = app_module.calculate_results_from_tally
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.2)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, "calculate_results_from_tally", counting)
+    snapshots = _hammer(
+        12, lambda: app_module.compute_results_coalesced(sample_poll)
+    )
+    assert len(calls) == 1
+    assert all(s is snapshots[0] for s in snapshots)
+    assert snapshots[0]["vote_count"] == 1
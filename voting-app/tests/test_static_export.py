@@ -0,0 +1,68 @@
+"""`flask export-static`: closed polls rendered to plain files."""
+import json
+import os
+
+
+def _close(admin_client, poll_id):
+    admin_client.post(f"/admin/poll/{poll_id}/toggle")
+
+
+def test_exports_closed_polls_only(
+    admin_client, sample_poll, app_module, tmp_path, vote
+):
+    vote(admin_client, sample_poll, "ann", (5, 2, 0))
+    out = tmp_path / "site"
+    assert app_module.export_static_site(str(out)) == (0, 0, 0)
+
+    _close(admin_client, sample_poll)
+    assert app_module.export_static_site(str(out)) == (1, 0, 0)
+    page = (out / "results" / sample_poll / "index.html").read_text()
+    assert "Lunch" in page and "Score Voting" in page and "Poll Closed" in page
+    # Assets are linked by their fingerprinted names, and those files (plus
+    # gzip variants for nginx) exist.
+    css, gz = sorted(os.listdir(out / "static"))
+    assert css.startswith("style.") and css != "style.css" and gz == f"{css}.gz"
+    assert f'href="/static/{css}"' in page
+    data = json.loads((out / "api" / "polls" / sample_poll / "results.json").read_text())
+    assert data["vote_count"] == 1 and data["is_open"] is False
+    assert data["results"]["score_voting"][:2] == [["Pizza", 5], ["Sushi", 2]]
+    assert data == admin_client.get(f"/api/polls/{sample_poll}/results").get_json()
+
+
+def test_reruns_only_render_changed_polls(
+    admin_client, sample_poll, app_module, tmp_path, vote
+):
+    _close(admin_client, sample_poll)
+    out = str(tmp_path / "site")
+    app_module.export_static_site(out)
+    assert app_module.export_static_site(out) == (0, 1, 0)
+
+    vote(admin_client, sample_poll, "ann", (5, 2, 0))  # closed: refused
+    assert app_module.get_votes(sample_poll) == []
+    assert app_module.export_static_site(out) == (0, 1, 0)
+
+    app_module.append_csv(
+        f"{app_module.DATA_DIR}/votes_{sample_poll}.csv",
+        {"username": "bob", "submitted_at": "2024-01-01T00:00:00", "scores": "1:3"},
+        app_module.votes_fieldnames(sample_poll),
+    )
+    app_module.mark_poll_changed(sample_poll)
+    assert app_module.export_static_site(out) == (1, 0, 0)
+
+
+def test_reopened_polls_are_removed(admin_client, sample_poll, app_module, tmp_path):
+    _close(admin_client, sample_poll)
+    out = tmp_path / "site"
+    app_module.export_static_site(str(out))
+    _close(admin_client, sample_poll)  # reopen
+    assert app_module.export_static_site(str(out)) == (0, 0, 1)
+    assert not (out / "results" / sample_poll).exists()
+    assert json.loads((out / "manifest.json").read_text()) == {}
+
+
+def test_cli_command(admin_client, sample_poll, app_module, tmp_path):
+    _close(admin_client, sample_poll)
+    runner = app_module.app.test_cli_runner()
+    result = runner.invoke(args=["export-static", str(tmp_path / "site")])
+    assert result.exit_code == 0, result.output
+    assert "Exported 1 poll(s)" in result.output
@@ -0,0 +1,268 @@
+"""Tests for tallies (algorithms.py) and chunked/parallel tallying of votes
+files (tally.py). The tally path must agree exactly with the serial
+parse_votes path."""
+import csv
+import os
+import random
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from algorithms import (
+    SCORES_FIELD,
+    add_ballot,
+    add_sparse_ballot,
+    calculate_all_results,
+    calculate_results_from_tally,
+    encode_scores,
+    finish_sparse_tally,
+    merge_tallies,
+    new_sparse_tally,
+    new_tally,
+    tally_votes,
+)
+from executor import MethodExecutor, MethodTimeout
+from tally import (
+    StaleVotesFile,
+    read_sidecar,
+    split_ranges,
+    tally_file,
+    write_sidecar,
+)
+
+
+def _options(n):
+    return [{"id": str(i + 1), "name": f"Option {i + 1}"} for i in range(n)]
+
+
+def _random_votes(n_options, n_votes, max_score=5, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "username": f"voter{k}",
+            "submitted_at": "2026-01-01T00:00:00",
+            **{f"option_{i + 1}": str(rng.randint(0, max_score)) for i in range(n_options)},
+        }
+        for k in range(n_votes)
+    ]
+
+
+def _write_votes(path, votes, n_options):
+    fieldnames = ["username", "submitted_at"] + [f"option_{i + 1}" for i in range(n_options)]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(votes)
+
+
+def _serial_map(fn, arg_lists):
+    return [fn(*args) for args in arg_lists]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_results_from_tally_match_serial_path(seed):
+    rng = random.Random(seed)
+    n = rng.randint(2, 6)
+    options = _options(n)
+    votes = _random_votes(n, rng.randint(1, 12), seed=seed)
+    try:
+        expected = calculate_all_results(votes, options, 5)
+    except RuntimeError:
+        pytest.skip("kemeny_young sanity check tripped on this input")
+    assert calculate_results_from_tally(tally_votes(votes, options), options) == expected
+
+
+def test_merge_is_elementwise_sum():
+    options = _options(3)
+    votes = _random_votes(3, 10)
+    merged = merge_tallies(tally_votes(votes[:4], options), tally_votes(votes[4:], options))
+    assert merged == tally_votes(votes, options)
+
+
+def test_split_ranges_align_on_rows(tmp_path):
+    path = tmp_path / "votes.csv"
+    _write_votes(path, _random_votes(4, 200), 4)
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        data = f.read()
+        header_end = data.index(b"\n") + 1
+    ranges = split_ranges(str(path), header_end, size, 7)
+    assert ranges[0][0] == header_end and ranges[-1][1] == size
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[start - 1 : start] == b"\n"
+
+
+def test_chunked_tally_matches_serial(tmp_path):
+    path = tmp_path / "votes.csv"
+    votes = _random_votes(5, 500, seed=3)
+    _write_votes(path, votes, 5)
+    options = _options(5)
+    chunked = tally_file(str(path), ["1", "2", "3", "4", "5"], chunks=8, map_fn=_serial_map)
+    assert chunked == tally_votes(votes, options)
+
+
+def test_quoted_newline_falls_back_to_serial(tmp_path):
+    path = tmp_path / "votes.csv"
+    votes = _random_votes(3, 50, seed=4)
+    for vote in votes[::3]:
+        vote["username"] += "\nwith a newline"
+    _write_votes(path, votes, 3)
+    result = tally_file(str(path), ["1", "2", "3"], chunks=16, map_fn=_serial_map)
+    assert result == tally_votes(votes, _options(3))
+
+
+@pytest.mark.parametrize("error", [BrokenProcessPool, MethodTimeout])
+def test_killed_pool_falls_back_to_serial(tmp_path, error):
+    path = tmp_path / "votes.csv"
+    votes = _random_votes(3, 100, seed=6)
+    _write_votes(path, votes, 3)
+
+    def broken_map(fn, arg_lists):
+        raise error("another call's timeout killed the pool")
+
+    result = tally_file(str(path), ["1", "2", "3"], chunks=4, map_fn=broken_map)
+    assert result == tally_votes(votes, _options(3))
+
+
+def test_process_pool_tally(tmp_path):
+    path = tmp_path / "votes.csv"
+    votes = _random_votes(4, 300, seed=5)
+    _write_votes(path, votes, 4)
+    executor = MethodExecutor(max_workers=2, timeout=30)
+    try:
+        result = tally_file(str(path), ["1", "2", "3", "4"], chunks=4, map_fn=executor.map)
+    finally:
+        executor.shutdown()
+    assert result == tally_votes(votes, _options(4))
+
+
+def test_replaced_file_is_detected(tmp_path):
+    path = tmp_path / "votes.csv"
+    _write_votes(path, _random_votes(2, 5), 2)
+    inode = os.stat(path).st_ino
+    tmp = tmp_path / "votes.csv.tmp"
+    _write_votes(tmp, _random_votes(2, 4), 2)
+    os.replace(tmp, path)
+    with pytest.raises(StaleVotesFile):
+        tally_file(str(path), ["1", "2"], inode=inode)
+
+
+def test_sidecar_round_trip_and_fold_in_appended_rows(tmp_path):
+    path, sidecar = tmp_path / "votes.csv", str(tmp_path / "tally.bin")
+    votes = _random_votes(3, 50, seed=2)
+    _write_votes(path, votes[:30], 3)
+    ids = ["1", "2", "3"]
+    st = os.stat(path)
+    tally = tally_file(str(path), ids)
+    write_sidecar(sidecar, str(path), tally, ids, st.st_size, st.st_ino)
+
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(votes[0]))
+        writer.writerows(votes[30:])
+    st = os.stat(path)
+    base, offset = read_sidecar(sidecar, str(path), ids, st.st_ino, st.st_size)
+    assert base == tally_votes(votes[:30], _options(3))
+    rest = tally_file(str(path), ids, start=offset, end=st.st_size)
+    assert merge_tallies(base, rest) == tally_votes(votes, _options(3))
+
+
+def test_sidecar_for_other_data_is_ignored(tmp_path):
+    path, sidecar = tmp_path / "votes.csv", str(tmp_path / "tally.bin")
+    _write_votes(path, _random_votes(2, 10), 2)
+    st = os.stat(path)
+    tally = tally_file(str(path), ["1", "2"])
+    write_sidecar(sidecar, str(path), tally, ["1", "2"], st.st_size, st.st_ino)
+
+    assert read_sidecar(sidecar, str(path), ["1", "3"], st.st_ino, st.st_size) is None
+    assert read_sidecar(sidecar, str(path), ["1", "2"], st.st_ino + 1, st.st_size) is None
+    assert read_sidecar(sidecar, str(path), ["1", "2"], st.st_ino, st.st_size - 1) is None
+    # Same inode, same size, different bytes.
+    with open(path, "r+b") as f:
+        f.seek(st.st_size - 3)
+        f.write(b"9" if f.read(1) != b"9" else b"8")
+    assert read_sidecar(sidecar, str(path), ["1", "2"], st.st_ino, st.st_size) is None
+    with open(sidecar, "wb") as f:
+        f.write(b"PCMT")
+    assert read_sidecar(sidecar, str(path), ["1", "2"], st.st_ino, st.st_size) is None
+
+
+def test_results_only_read_rows_since_the_sidecar(
+    app_module, client, sample_poll, monkeypatch
+):
+    for i in range(3):
+        scores = {"score_1": "5", "score_2": str(i), "score_3": "0"}
+        client.post(f"/vote/{sample_poll}", data={"username": f"v{i}", **scores})
+    app_module.compute_results_snapshot(sample_poll)
+    assert os.path.exists(app_module._tally_sidecar_path(sample_poll))
+
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "late", "score_1": "0", "score_2": "0", "score_3": "5"},
+    )
+    starts = []
+    real = app_module.tally_file
+
+    def recording(*args, **kwargs):
+        starts.append(kwargs.get("start"))
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, "tally_file", recording)
+    snapshot = app_module.compute_results_snapshot(sample_poll)
+    assert starts and starts[-1] is not None
+    assert snapshot["vote_count"] == 4
+    assert snapshot["tally"] == tally_votes(
+        app_module.get_votes(sample_poll), app_module.get_options(sample_poll)
+    )
+
+    # Deleting a vote rewrites the file and throws the sidecar away.
+    client.post(f"/admin/poll/{sample_poll}/delete_vote/late")
+    assert app_module.compute_results_snapshot(sample_poll)["vote_count"] == 3
+
+
+def _mostly_zero_ballots(n_options, n_votes, seed=0):
+    rng = random.Random(seed)
+    ballots = []
+    for _ in range(n_votes):
+        scores = [0] * n_options
+        for i in rng.sample(range(n_options), rng.randint(0, 4)):
+            scores[i] = rng.randint(0, 5)
+        ballots.append(scores)
+    return ballots
+
+
+def test_sparse_tally_matches_dense():
+    dense, sparse = new_tally(12), new_sparse_tally(12)
+    for scores in _mostly_zero_ballots(12, 200, seed=1):
+        add_ballot(dense, scores)
+        add_sparse_ballot(sparse, [(i, s) for i, s in enumerate(scores) if s])
+    assert finish_sparse_tally(sparse) == dense
+
+
+def test_sparse_votes_file(tmp_path):
+    path = tmp_path / "votes.csv"
+    ballots = _mostly_zero_ballots(30, 120, seed=2)
+    ids = [str(i + 1) for i in range(30)]
+    votes = [
+        {
+            "username": f"voter{k}",
+            "submitted_at": "2026-01-01T00:00:00",
+            SCORES_FIELD: encode_scores(dict(zip(ids, scores))),
+        }
+        for k, scores in enumerate(ballots)
+    ]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        fieldnames = ["username", "submitted_at", SCORES_FIELD]
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(votes)
+
+    expected = new_tally(30)
+    for scores in ballots:
+        add_ballot(expected, scores)
+    assert tally_votes(votes, _options(30)) == expected
+    assert tally_file(str(path), ids) == expected
+    assert tally_file(str(path), ids, chunks=3, map_fn=_serial_map) == expected
+    # An option the poll no longer has is ignored rather than miscounted.
+    assert tally_file(str(path), ids[:10]) == tally_votes(votes, _options(10))
+    # Only non-zero scores are written.
+    assert os.path.getsize(path) < 40 * len(ballots)
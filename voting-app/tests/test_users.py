@@ -294,3 +294,144 @@ def test_secret_key_env_var_overrides_disk(app_module, monkeypatch):
     monkeypatch.setenv("FLASK_SECRET_KEY", "my-explicit-secret")
     key = app_module._load_or_create_secret_key()
     assert key == b"my-explicit-secret"
+
+
+def test_admin_users_pages_and_searches_by_prefix(admin_client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "USERS_PAGE_SIZE", 2)
+    for name in ("carol", "bob", "bea", "al"):
+        app_module.add_user(name, "pw12345")
+    listing = admin_client.get("/admin/users").get_data(as_text=True)
+    assert "5 users" in listing and "Page 1 of 3" in listing
+    # Sorted by username: admin, al | bea, bob | carol.
+    assert "al" in listing and "bea" not in listing
+
+    found = admin_client.get("/admin/users?q=b").get_data(as_text=True)
+    assert '2 users matching "b"' in found
+    assert "bea" in found and "bob" in found and "carol" not in found
+    assert "password_hash" not in found and "pbkdf2" not in found and "scrypt" not in found
+
+
+def test_user_lookups_do_not_rescan_users_csv(app_module, monkeypatch):
+    app_module.add_user("alice", "alicepw")
+    app_module.get_user("alice")  # index is now caught up
+
+    def no_full_reads(path):
+        raise AssertionError(f"read the whole of {path}")
+
+    monkeypatch.setattr(app_module, "read_csv", no_full_reads)
+    assert app_module.get_user("alice")["username"] == "alice"
+    assert app_module.get_user("nobody") is None
+    assert app_module.add_user("alice", "other") is False
+
+
+def _users_csv_rows(app_module):
+    with open(app_module._users_path(), encoding="utf-8") as f:
+        return f.read().splitlines()[1:]
+
+
+def test_user_writes_append_to_the_log(admin_client, app_module):
+    before = _users_csv_rows(app_module)
+    app_module.add_user("alice", "alicepw")
+    admin_client.post(f"/admin/users/alice/delete")
+    rows = _users_csv_rows(app_module)
+    assert rows[: len(before)] == before
+    assert len(rows) == len(before) + 2 and rows[-1].startswith("alice,")
+    assert app_module.get_user("alice") is None
+    assert [u["username"] for u in app_module.get_users()] == [app_module.ADMIN_USER]
+
+    # Re-creating a deleted username works and takes the new password.
+    assert app_module.add_user("alice", "newpass")
+    client = app_module.app.test_client()
+    resp = client.post("/admin", data={"username": "alice", "password": "newpass"})
+    assert resp.status_code == 302
+
+
+def test_password_change_supersedes_the_old_record(admin_client, app_module):
+    admin_client.post(
+        "/admin/change-password",
+        data={
+            "old_password": app_module.ADMIN_PASS,
+            "new_password": "brandnew",
+            "confirm_password": "brandnew",
+        },
+    )
+    assert len(_users_csv_rows(app_module)) == 2
+    client = app_module.app.test_client()
+    old = client.post(
+        "/admin",
+        data={"username": app_module.ADMIN_USER, "password": app_module.ADMIN_PASS},
+    )
+    assert old.status_code == 200  # login form re-rendered with an error
+    new = client.post(
+        "/admin", data={"username": app_module.ADMIN_USER, "password": "brandnew"}
+    )
+    assert new.status_code == 302
+
+
+def test_log_is_compacted_once_mostly_dead(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "USERS_COMPACT_MIN_RECORDS", 5)
+    for name in ("a", "b", "c"):
+        app_module.add_user(name, "pw12345")
+    for name in ("a", "b"):
+        app_module.append_user_records([{"username": name, "op": "delete"}])
+    assert len(_users_csv_rows(app_module)) == 6
+    app_module.append_user_records([{"username": "c", "op": "delete"}])
+    # 6 dead rows (3 users, 3 deletes) >= max(5, 1 live user): rewritten with just the admin.
+    rows = _users_csv_rows(app_module)
+    assert len(rows) == 1 and rows[0].startswith(f"{app_module.ADMIN_USER},")
+
+
+def test_pre_log_users_csv_gets_an_op_column_before_appending(app_module):
+    import csv
+
+    old_fields = ["username", "password_hash", "is_admin", "created_at"]
+    admin = app_module.get_user(app_module.ADMIN_USER)
+    with open(app_module._users_path(), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=old_fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerow(admin)
+    app_module.add_user("alice", "alicepw")
+    app_module.append_user_records([{"username": "alice", "op": "delete"}])
+    with open(app_module._users_path(), encoding="utf-8") as f:
+        assert f.readline().strip().split(",") == app_module.USERS_FIELDS
+    assert app_module.get_user("alice") is None
+    assert app_module.get_user(app_module.ADMIN_USER)["password_hash"] == admin["password_hash"]
+
+
+def test_login_upgrades_hashes_made_with_old_parameters(client, app_module):
+    from werkzeug.security import generate_password_hash
+
+    app_module.add_user("alice", "alicepw")
+    old_hash = generate_password_hash("alicepw", "pbkdf2:sha256:1000")
+    app_module.set_password_hash("alice", old_hash)
+    resp = client.post("/admin", data={"username": "alice", "password": "alicepw"})
+    assert resp.status_code == 302
+    new_hash = app_module.get_user("alice")["password_hash"]
+    assert new_hash != old_hash
+    assert not app_module.password_hasher.needs_rehash(new_hash)
+
+
+def test_add_user_hashes_outside_the_csv_lock(app_module, monkeypatch):
+    held = []
+    real_hash = app_module.password_hasher.hash
+
+    def recording_hash(password):
+        held.append(app_module._csv_lock._is_owned())
+        return real_hash(password)
+
+    monkeypatch.setattr(app_module.password_hasher, "hash", recording_hash)
+    assert app_module.add_user("alice", "alicepw")
+    assert held == [False]
+
+
+def test_overloaded_hasher_answers_503(client, app_module, monkeypatch):
+    def busy(*args):
+        raise app_module.HasherBusy("full")
+
+    monkeypatch.setattr(app_module.password_hasher, "verify", busy)
+    resp = client.post(
+        "/admin",
+        data={"username": app_module.ADMIN_USER, "password": app_module.ADMIN_PASS},
+    )
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
@@ -0,0 +1,74 @@
+"""VoterIndex: incremental indexing of a votes file's usernames."""
+import os
+
+from voters import VoterIndex
+
+
+def _write(path, rows, mode="w"):
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        if mode == "w":
+            f.write("username,submitted_at,scores\n")
+        for name in rows:
+            f.write(f"{name},2024-01-01T00:00:00,1:3\n")
+
+
+def _refresh(index):
+    index.refresh(os.stat(index.path))
+
+
+def test_only_reads_rows_appended_since_the_last_refresh(tmp_path):
+    path = tmp_path / "votes.csv"
+    _write(path, ["bob", "ann"])
+    index = VoterIndex(str(path))
+    _refresh(index)
+    assert "ann" in index and len(index) == 2
+    offset = index._offset
+    _write(path, ["cat"], mode="a")
+    _refresh(index)
+    assert index._offset > offset
+    assert index.page(1, 10) == (
+        [
+            ("bob", "2024-01-01T00:00:00"),
+            ("ann", "2024-01-01T00:00:00"),
+            ("cat", "2024-01-01T00:00:00"),
+        ],
+        3,
+    )
+
+
+def test_rewritten_file_is_indexed_from_scratch(tmp_path):
+    path = tmp_path / "votes.csv"
+    _write(path, ["bob", "ann"])
+    index = VoterIndex(str(path))
+    _refresh(index)
+    tmp = tmp_path / "votes.tmp"
+    _write(tmp, ["ann"])
+    os.replace(tmp, path)
+    _refresh(index)
+    assert "bob" not in index and len(index) == 1
+
+
+def test_ignores_bytes_past_the_size_it_was_given(tmp_path):
+    path = tmp_path / "votes.csv"
+    _write(path, ["ann"])
+    st = os.stat(path)
+    _write(path, ["bob"], mode="a")
+    index = VoterIndex(str(path))
+    index.refresh(st)
+    assert "bob" not in index
+    _refresh(index)
+    assert "bob" in index
+
+
+def test_prefix_pages_are_sorted(tmp_path):
+    path = tmp_path / "votes.csv"
+    _write(path, ["carl", "ca", "bob", "cat", "car"])
+    index = VoterIndex(str(path))
+    _refresh(index)
+    assert [u for u, _ in index.page(1, 2, "ca")[0]] == ["ca", "car"]
+    assert index.page(2, 2, "ca") == (
+        [("carl", "2024-01-01T00:00:00"), ("cat", "2024-01-01T00:00:00")],
+        4,
+    )
+    assert index.page(1, 2, "car")[1] == 2
+    assert index.page(1, 2, "z") == ([], 0)
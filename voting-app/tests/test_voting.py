@@ -128,3 +128,29 @@ def test_results_renders_with_many_voters(client, sample_poll):
         )
     resp = client.get(f"/results/{sample_poll}")
     assert resp.status_code == 200
+
+
+def test_votes_are_stored_sparsely(client, sample_poll, app_module):
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "alice", "score_1": "5", "score_2": "0", "score_3": "2"},
+    )
+    with open(f"{app_module.DATA_DIR}/votes_{sample_poll}.csv") as f:
+        header, row = f.read().splitlines()
+    assert header == "username,submitted_at,scores"
+    assert row.endswith(",1:5 3:2")
+
+
+def test_old_dense_votes_file_keeps_its_layout(client, sample_poll, app_module):
+    path = f"{app_module.DATA_DIR}/votes_{sample_poll}.csv"
+    with open(path, "w") as f:
+        f.write("username,submitted_at,option_1,option_2,option_3\n")
+        f.write("old,2025-01-01T00:00:00,1,0,4\n")
+    client.post(
+        f"/vote/{sample_poll}",
+        data={"username": "new", "score_1": "5", "score_2": "0", "score_3": "0"},
+    )
+    votes = app_module.get_votes(sample_poll)
+    assert [v["option_1"] for v in votes] == ["1", "5"]
+    snapshot = app_module.compute_results_snapshot(sample_poll)
+    assert snapshot["results"]["score_voting"][0] == ("Pizza", 6)
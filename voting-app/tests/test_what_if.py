@@ -0,0 +1,73 @@
+"""Tests for what-if results over a subset of a poll's options."""
+import random
+import time
+
+from algorithms import calculate_all_results, subset_tally, tally_votes
+
+
+def test_subset_tally_matches_ballots_without_the_dropped_options():
+    rng = random.Random(3)
+    options = [{"id": str(i), "name": f"O{i}"} for i in range(6)]
+    votes = [
+        {f"option_{o['id']}": str(rng.randint(0, 5)) for o in options}
+        for _ in range(40)
+    ]
+    keep = [0, 2, 3, 5]
+    subset = [options[i] for i in keep]
+    assert subset_tally(tally_votes(votes, options), keep) == tally_votes(
+        votes, subset
+    )
+
+
+def test_subset_api_matches_a_poll_without_those_options(
+    client, sample_poll, app_module, vote
+):
+    ballots = {"ann": (5, 4, 0), "bob": (1, 5, 3), "cat": (4, 0, 5), "dan": (2, 3, 1)}
+    for username, scores in ballots.items():
+        vote(client, sample_poll, username, scores)
+    # What-if answers come from the published snapshot; wait for the
+    # debounced recompute that includes every ballot.
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        latest = app_module.results_scheduler.latest(sample_poll) or {}
+        if latest.get("vote_count") == 4:
+            break
+        time.sleep(0.05)
+
+    resp = client.get(f"/api/polls/{sample_poll}/results/subset?option=1&option=3")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["vote_count"] == 4
+    assert body["option_ids"] == ["1", "3"]
+
+    options = [{"id": "1", "name": "Pizza"}, {"id": "3", "name": "Tacos"}]
+    votes = [
+        {"username": u, "option_1": str(s[0]), "option_3": str(s[2])}
+        for u, s in ballots.items()
+    ]
+    expected = calculate_all_results(votes, options, 5)
+    # JSON turns the (name, value) tuples into lists.
+    assert body["results"] == {
+        k: [list(row) for row in v] for k, v in expected.items()
+    }
+
+
+def test_subset_api_rejects_bad_selections(client, sample_poll, vote):
+    vote(client, sample_poll, "ann", (5, 1, 0))
+    url = f"/api/polls/{sample_poll}/results/subset"
+    assert client.get(url).status_code == 400
+    assert client.get(f"{url}?option=1&option=99").status_code == 400
+    assert client.get("/api/polls/nope/results/subset?option=1").status_code == 404
+
+
+def test_what_if_page(client, sample_poll, vote):
+    vote(client, sample_poll, "ann", (5, 1, 0))
+    page = client.get(f"/results/{sample_poll}/what-if")
+    assert page.status_code == 200
+    assert b"Tacos" in page.data and b"Score Voting" in page.data
+
+    page = client.get(f"/results/{sample_poll}/what-if?what_if=1&option=2")
+    assert b"Score Voting" in page.data
+
+    page = client.get(f"/results/{sample_poll}/what-if?what_if=1")
+    assert b"Pick at least one option" in page.data
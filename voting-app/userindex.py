@@ -0,0 +1,83 @@
+"""In-memory index of users.csv.
+
+`get_user` runs on nearly every request (current_user), and signup and
+admin_users_create ask whether a username is taken, so scanning users.csv
+for each of those grows with every self-service signup. A `UserIndex`
+keeps each user by username, for O(1) lookups, plus a sorted list of
+usernames that the admin user list pages through and prefix-searches by
+bisecting. It is a FileIndex, so it only reads rows appended since the
+last request.
+
+users.csv is a log (see USERS_FIELDS in app.py): a row is the user's whole
+current record, replacing any earlier one, unless its "op" is "delete".
+The index folds it as it reads, and counts the rows that no longer
+describe a live user so the app knows when to compact the file.
+"""
+from fileindex import FileIndex, SortedNames
+
+
+class UserIndex(FileIndex):
+    def clear(self):
+        self._users = {}  # username -> row dict
+        self._sorted = SortedNames()  # usernames
+        self._admins = 0
+        self._records = 0  # rows read, live or not
+
+    def add_rows(self, rows):
+        added = []
+        for values in rows:
+            record = dict(zip(self.fieldnames, values))
+            username = record.get("username")
+            if not username:
+                continue
+            self._records += 1
+            op = record.pop("op", "")
+            old = self._users.get(username)
+            if old is not None:
+                self._admins -= old.get("is_admin") == "true"
+            if op == "delete":
+                if old is not None:
+                    del self._users[username]
+                    self._drop_sorted(username, added)
+                continue
+            self._users[username] = record
+            self._admins += record.get("is_admin") == "true"
+            if old is None:
+                added.append(username)
+        self._sorted.add(added)
+
+    def _drop_sorted(self, username, pending):
+        if username in pending:
+            pending.remove(username)
+        else:
+            self._sorted.remove(username)
+
+    def get(self, username):
+        with self._lock:
+            user = self._users.get(username)
+            return dict(user) if user else None
+
+    def __contains__(self, username):
+        return username in self._users
+
+    def __len__(self):
+        return len(self._users)
+
+    def admin_count(self):
+        return self._admins
+
+    def dead_records(self):
+        """Rows in the file that a compaction would drop."""
+        return self._records - len(self._users)
+
+    def users(self):
+        """Every live user, in the order they were created."""
+        with self._lock:
+            return [dict(user) for user in self._users.values()]
+
+    def page(self, page, per_page, prefix=""):
+        """Return (users on 1-based `page` in username order, number of
+        users matching). Only usernames starting with `prefix` match."""
+        with self._lock:
+            names, total = self._sorted.page(page, per_page, prefix)
+            return [dict(self._users[n]) for n in names], total
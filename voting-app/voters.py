@@ -0,0 +1,63 @@
+"""In-memory indexes of who has voted on a poll.
+
+The admin voter list, its username search and the "already voted?" checks
+in `vote` and `import_ballots` only need usernames (and when they voted),
+but a votes file can hold millions of ballots. A `VoterIndex` keeps
+(username, submitted_at) in file order plus a sorted copy of the
+usernames; a `VoteCount` keeps only how many ballots there are, small
+enough to hold for every poll on the dashboard. Both are FileIndexes, so
+they read each row once.
+"""
+from fileindex import FileIndex, SortedNames
+
+
+class VoterIndex(FileIndex):
+    def clear(self):
+        self._rows = []  # (username, submitted_at) in file order
+        self._positions = {}  # username -> index into _rows
+        self._sorted = SortedNames()  # usernames
+
+    def add_rows(self, rows):
+        position = {name: i for i, name in enumerate(self.fieldnames)}
+        user_col = position.get("username", 0)
+        time_col = position.get("submitted_at")
+        added = []
+        for row in rows:
+            if user_col >= len(row):
+                continue
+            username = row[user_col]
+            submitted_at = ""
+            if time_col is not None and time_col < len(row):
+                submitted_at = row[time_col]
+            self._positions[username] = len(self._rows)
+            self._rows.append((username, submitted_at))
+            added.append(username)
+        self._sorted.add(added)
+
+    def __contains__(self, username):
+        return username in self._positions
+
+    def __len__(self):
+        return len(self._rows)
+
+    def page(self, page, per_page, prefix=""):
+        """Return ([(username, submitted_at), ...] on 1-based `page`, number
+        of matching voters). Without a prefix voters are in the order they
+        voted; with one, matching usernames are in sorted order."""
+        with self._lock:
+            if not prefix:
+                start = (page - 1) * per_page
+                return self._rows[start : start + per_page], len(self._rows)
+            names, total = self._sorted.page(page, per_page, prefix)
+            return [self._rows[self._positions[n]] for n in names], total
+
+
+class VoteCount(FileIndex):
+    def clear(self):
+        self._count = 0
+
+    def add_rows(self, rows):
+        self._count += sum(1 for _ in rows)
+
+    def __len__(self):
+        return self._count